@@ -1,3 +1,4 @@
+import queue
 import threading
 import time
 from config import AUDIO_FORMAT, AUDIO_CHANNELS, AUDIO_RATE, CHUNK_SIZE
@@ -13,26 +14,35 @@ except ImportError:
     print("   pip install PyAudio")
 
 class AudioRecorder:
-    def __init__(self):
+    def __init__(self, channels=AUDIO_CHANNELS):
         if not AUDIO_AVAILABLE:
             raise ImportError("PyAudio is not available. Please install it to use audio recording.")
         self.audio = pyaudio.PyAudio()
+        self.channels = channels
         self.is_recording = False
         self.frames = []
         self.stream = None
+        self.chunk_queue = None
         
-    def start_recording(self):
-        """Start recording audio"""
+    def start_recording(self, stream=False):
+        """
+        Start recording audio
+        
+        Args:
+            stream (bool): If True, chunks are also made available through
+                iter_chunks() while recording, for streaming uploads
+        """
         if self.is_recording:
             return False
             
         self.frames = []
+        self.chunk_queue = queue.Queue() if stream else None
         self.is_recording = True
         
         # Configure audio stream
         self.stream = self.audio.open(
             format=pyaudio.paInt16,
-            channels=AUDIO_CHANNELS,
+            channels=self.channels,
             rate=AUDIO_RATE,
             input=True,
             frames_per_buffer=CHUNK_SIZE
@@ -60,6 +70,10 @@ class AudioRecorder:
             self.stream.stop_stream()
             self.stream.close()
         
+        # End any streaming upload
+        if self.chunk_queue:
+            self.chunk_queue.put(None)
+        
         return self.frames
     
     def _record(self):
@@ -68,17 +82,34 @@ class AudioRecorder:
             try:
                 data = self.stream.read(CHUNK_SIZE, exception_on_overflow=False)
                 self.frames.append(data)
+                if self.chunk_queue:
+                    self.chunk_queue.put(data)
             except Exception as e:
                 print(f"Error during recording: {e}")
                 break
     
+    def iter_chunks(self):
+        """Yield recorded chunks as they arrive, until recording stops"""
+        chunk_queue = self.chunk_queue
+        if chunk_queue is None:
+            return
+        while True:
+            chunk = chunk_queue.get()
+            if chunk is None:
+                break
+            yield chunk
+    
+    def get_sample_width(self):
+        """Return the number of bytes per recorded sample"""
+        return self.audio.get_sample_size(pyaudio.paInt16)
+    
     def save_audio(self, filename="temp_audio.wav"):
         """Save recorded audio to file"""
         if not self.frames:
             return None
             
         wf = wave.open(filename, 'wb')
-        wf.setnchannels(AUDIO_CHANNELS)
+        wf.setnchannels(self.channels)
         wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16))
         wf.setframerate(AUDIO_RATE)
         wf.writeframes(b''.join(self.frames))
@@ -0,0 +1,158 @@
+"""
+WAV helpers shared by the recorder and the Sarvam client
+"""
+
+import os
+import struct
+import wave
+
+# Size fields of a WAV header whose length is not known yet
+UNKNOWN_WAV_SIZE = 0xFFFFFFFF
+
+
+def read_wav(path):
+    """
+    Read a WAV file into memory
+
+    Args:
+        path (str): Path to the WAV file
+
+    Returns:
+        tuple: (frames bytes, channels, sample width in bytes, frame rate)
+    """
+    with wave.open(path, 'rb') as wf:
+        return (
+            wf.readframes(wf.getnframes()),
+            wf.getnchannels(),
+            wf.getsampwidth(),
+            wf.getframerate()
+        )
+
+
+def write_wav(path, frames, channels, sample_width, rate):
+    """Write raw PCM frames to a WAV file and return its path"""
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(rate)
+        wf.writeframes(frames)
+    return path
+
+
+def streaming_wav_header(channels, sample_width, rate):
+    """
+    Build a WAV header for audio whose final length is not known yet
+
+    The RIFF and data sizes are set to the maximum value, which decoders
+    treat as "read until end of stream".
+    """
+    byte_rate = rate * channels * sample_width
+    return (
+        b'RIFF' + struct.pack('<I', UNKNOWN_WAV_SIZE) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, rate, byte_rate,
+                                channels * sample_width, sample_width * 8)
+        + b'data' + struct.pack('<I', UNKNOWN_WAV_SIZE)
+    )
+
+
+def read_wav_header(path):
+    """
+    Read the format of a WAV file without loading its frames
+
+    Returns:
+        tuple: (frame count, channels, sample width in bytes, frame rate)
+    """
+    with wave.open(path, 'rb') as wf:
+        return wf.getnframes(), wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+
+
+def wav_channels(path):
+    """Return the channel count of a WAV file, or 1 if it is not a readable WAV"""
+    try:
+        with wave.open(path, 'rb') as wf:
+            return wf.getnchannels()
+    except (wave.Error, EOFError, OSError):
+        return 1
+
+
+def split_channels(frames, channels, sample_width):
+    """
+    De-interleave PCM frames into one mono buffer per channel
+
+    Each byte lane of each channel is copied with a single strided slice
+    assignment, so no per-sample Python loop is involved.
+
+    Args:
+        frames (bytes): Interleaved PCM data
+        channels (int): Number of interleaved channels
+        sample_width (int): Bytes per sample
+
+    Returns:
+        list: One bytes object per channel
+    """
+    if channels == 1:
+        return [bytes(frames)]
+
+    frame_size = channels * sample_width
+    usable = len(frames) - len(frames) % frame_size
+    view = memoryview(frames)[:usable]
+    num_frames = usable // frame_size
+
+    result = []
+    for channel in range(channels):
+        mono = bytearray(num_frames * sample_width)
+        for lane in range(sample_width):
+            mono[lane::sample_width] = view[channel * sample_width + lane::frame_size]
+        result.append(bytes(mono))
+    return result
+
+
+def split_wav_channels(path, output_dir):
+    """
+    Split a multi-channel WAV file into mono WAV files
+
+    Args:
+        path (str): Path to the multi-channel WAV file
+        output_dir (str): Directory for the per-channel files
+
+    Returns:
+        list: Paths of the mono files, in channel order
+    """
+    frames, channels, sample_width, rate = read_wav(path)
+    base = os.path.splitext(os.path.basename(path))[0]
+
+    paths = []
+    for index, mono in enumerate(split_channels(frames, channels, sample_width)):
+        channel_path = os.path.join(output_dir, f"{base}_ch{index + 1}.wav")
+        paths.append(write_wav(channel_path, mono, 1, sample_width, rate))
+    return paths
+
+
+def iter_wav_windows(path, window_seconds):
+    """
+    Read a WAV file one fixed-length window at a time
+
+    Frames are read lazily, one window per iteration, so arbitrarily long
+    files can be processed with bounded memory.
+
+    Args:
+        path (str): Path to the WAV file
+        window_seconds (float): Window length in seconds
+
+    Yields:
+        tuple: (start seconds, end seconds, frames bytes, channels, sample width, frame rate)
+    """
+    with wave.open(path, 'rb') as wf:
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        rate = wf.getframerate()
+        frames_per_window = max(1, int(window_seconds * rate))
+
+        position = 0
+        while True:
+            frames = wf.readframes(frames_per_window)
+            if not frames:
+                break
+            count = len(frames) // (channels * sample_width)
+            yield position / rate, (position + count) / rate, frames, channels, sample_width, rate
+            position += count
@@ -0,0 +1,254 @@
+"""
+Pack many short clips into one transcription request
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+
+from audio_utils import read_wav, read_wav_header, write_wav
+from config import (
+    PACK_TARGET_SECONDS, PACK_GAP_SECONDS, PACK_MAX_CLIP_SECONDS, PACK_BOUNDARY_TOLERANCE, PACK_SPEECH_LEVEL,
+    SCRIPT_CONFIDENCE_THRESHOLD
+)
+from language_id import classify_text
+
+
+def _probe_clip(path):
+    """Read a clip's WAV header, or return None if it cannot be packed (not a WAV)"""
+    try:
+        frame_count, channels, sample_width, rate = read_wav_header(path)
+    except Exception:
+        return None
+    return {
+        'path': path,
+        'format': (channels, sample_width, rate),
+        'duration': frame_count / rate
+    }
+
+
+def _has_sound(frames, channels, sample_width, rate, level=PACK_SPEECH_LEVEL):
+    """
+    Check whether any 50 ms window of PCM audio is louder than `level`
+
+    Args:
+        level (float): RMS as a share of full scale
+
+    Returns:
+        bool: True if some window is above the level (or the sample width is unsupported)
+    """
+    typecodes = {1: 'B', 2: 'h', 4: 'i'}
+    if sample_width not in typecodes or array(typecodes[sample_width]).itemsize != sample_width:
+        return True
+    samples = array(typecodes[sample_width])
+    samples.frombytes(frames[:len(frames) - len(frames) % sample_width])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+
+    center = 128 if sample_width == 1 else 0
+    limit = (level * 2 ** (8 * sample_width - 1)) ** 2
+    window = max(1, int(rate * channels * 0.05))
+    for start in range(0, len(samples), window):
+        chunk = samples[start:start + window]
+        if sum((value - center) ** 2 for value in chunk) > limit * len(chunk):
+            return True
+    return False
+
+
+def plan_packs(clips, target_seconds=PACK_TARGET_SECONDS, gap_seconds=PACK_GAP_SECONDS,
+               max_clip_seconds=PACK_MAX_CLIP_SECONDS):
+    """
+    Group clip indices into packs of consecutive, same-format short clips
+
+    Args:
+        clips (list): Probed clips (None for clips that cannot be packed)
+        target_seconds (float): Maximum packed duration, separators included
+        gap_seconds (float): Silence inserted between clips
+        max_clip_seconds (float): Longer clips are always sent on their own
+
+    Returns:
+        list: Lists of clip indices; single-element lists are sent unpacked
+    """
+    packs = []
+    current, current_format, current_seconds = [], None, 0.0
+    for index, clip in enumerate(clips):
+        if clip is None or clip['duration'] > max_clip_seconds:
+            if current:
+                packs.append(current)
+            packs.append([index])
+            current, current_format, current_seconds = [], None, 0.0
+            continue
+
+        added = clip['duration'] + (gap_seconds if current else 0)
+        if current and (clip['format'] != current_format or current_seconds + added > target_seconds):
+            packs.append(current)
+            current, current_seconds, added = [], 0.0, clip['duration']
+        current.append(index)
+        current_format = clip['format']
+        current_seconds += added
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _build_pack(clips, indices, gap_seconds, path):
+    """
+    Concatenate clips with silence separators
+
+    Frames are read here, one pack at a time, so memory does not grow with
+    the number of clips in the batch.
+
+    Returns:
+        tuple: (each clip's (start, end) in seconds, whether each clip has sound)
+    """
+    channels, sample_width, rate = clips[indices[0]]['format']
+    silence_byte = b'\x80' if sample_width == 1 else b'\x00'
+    gap = silence_byte * (int(gap_seconds * rate) * channels * sample_width)
+
+    parts, intervals, has_sound, position = [], [], [], 0.0
+    for n, index in enumerate(indices):
+        if n:
+            parts.append(gap)
+            position += gap_seconds
+        frames = read_wav(clips[index]['path'])[0]
+        duration = len(frames) / (channels * sample_width * rate)
+        parts.append(frames)
+        intervals.append((position, position + duration))
+        has_sound.append(_has_sound(frames, channels, sample_width, rate))
+        position += duration
+
+    write_wav(path, b''.join(parts), channels, sample_width, rate)
+    return intervals, has_sound
+
+
+def split_packed_result(result, intervals, tolerance=PACK_BOUNDARY_TOLERANCE, has_sound=None):
+    """
+    Map a packed transcription back to its clips using segment timestamps
+
+    Args:
+        result (dict): Successful transcription of the pack, with timestamps
+        intervals (list): (start, end) seconds of each clip in the pack
+        tolerance (float): Seconds a segment may spill past its clip
+        has_sound (list): Per clip, whether it has audible sound; such a clip
+            with no segments was probably dropped or merged by the model
+
+    Returns:
+        list: Per-clip results, or None if the alignment is ambiguous (no
+              timestamps, a segment that falls in a gap or spans two clips,
+              or a clip with sound but no segments)
+    """
+    timestamps = result.get('timestamps') or {}
+    segments = timestamps.get('words') or []
+    starts = timestamps.get('start_time_seconds') or []
+    ends = timestamps.get('end_time_seconds') or []
+    if not len(segments) == len(starts) == len(ends):
+        return None
+    if not segments and result['transcript'].strip():
+        return None
+
+    texts = [[] for _ in intervals]
+    clip_timestamps = [{'words': [], 'start_time_seconds': [], 'end_time_seconds': []} for _ in intervals]
+    for text, start, end in zip(segments, starts, ends):
+        if not text.strip():
+            continue
+        owners = [
+            i for i, (clip_start, clip_end) in enumerate(intervals)
+            if start < clip_end + tolerance and end > clip_start - tolerance
+        ]
+        if len(owners) != 1:
+            return None
+        owner = owners[0]
+        clip_start = intervals[owner][0]
+        texts[owner].append(text.strip())
+        clip_timestamps[owner]['words'].append(text)
+        clip_timestamps[owner]['start_time_seconds'].append(max(0.0, start - clip_start))
+        clip_timestamps[owner]['end_time_seconds'].append(max(0.0, end - clip_start))
+
+    if has_sound and any(sound and not parts for sound, parts in zip(has_sound, texts)):
+        return None
+
+    clip_results = []
+    for text_parts, clip_ts in zip(texts, clip_timestamps):
+        transcript = ' '.join(text_parts)
+        language = result.get('language_detected', 'unknown')
+        if transcript:
+            classification = classify_text(transcript)
+            if (classification['confidence'] >= SCRIPT_CONFIDENCE_THRESHOLD
+                    and language not in classification['candidates']):
+                language = classification['language_code']
+        clip_results.append({
+            'success': True,
+            'transcript': transcript,
+            'language_detected': language,
+            'confidence': result.get('confidence', 0),
+            'translated_to_english': False,
+            'timestamps': clip_ts,
+            'packed': True
+        })
+    return clip_results
+
+
+def transcribe_packed(stt, clip_paths, language_code="unknown", translate_to_english=False,
+                      target_seconds=PACK_TARGET_SECONDS, gap_seconds=PACK_GAP_SECONDS, priority="batch"):
+    """
+    Transcribe many short clips with as few requests as possible
+
+    Consecutive short WAV clips are concatenated with silence separators up
+    to `target_seconds` and sent as one request with timestamps. The
+    transcript is split back per clip by timestamp; when that is ambiguous
+    the clips of that pack are sent one by one instead. A failed pack
+    request is not retried per clip: each of its clips gets the failure,
+    'retryable' flag included, so throttling is not multiplied.
+
+    Args:
+        stt (SarvamSTT): Client used for transcription
+        clip_paths (list): Audio clips, results come back in the same order
+        language_code (str): Language code or 'unknown' for auto-detect
+        translate_to_english (bool): If True, translates each clip transcript to English
+        target_seconds (float): Maximum packed duration
+        gap_seconds (float): Silence between packed clips
+        priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+
+    Returns:
+        dict: 'results' (one per clip) and 'stats' with the request reduction
+    """
+    clips = [_probe_clip(path) for path in clip_paths]
+    results = [None] * len(clip_paths)
+    stats = {'clips': len(clip_paths), 'requests': 0, 'packed_requests': 0, 'fallback_clips': 0}
+
+    temp_dir = tempfile.mkdtemp(prefix="sarvam_packs_")
+    try:
+        for n, indices in enumerate(plan_packs(clips, target_seconds, gap_seconds)):
+            clip_results = None
+            if len(indices) > 1:
+                pack_path = os.path.join(temp_dir, f"pack_{n}.wav")
+                intervals, has_sound = _build_pack(clips, indices, gap_seconds, pack_path)
+                packed = stt.transcribe_audio(pack_path, language_code, with_timestamps=True, priority=priority)
+                os.remove(pack_path)
+                stats['requests'] += 1
+                stats['packed_requests'] += 1
+                if not packed['success']:
+                    clip_results = [dict(packed) for _ in indices]
+                else:
+                    clip_results = split_packed_result(packed, intervals, has_sound=has_sound)
+                    if clip_results is None:
+                        stats['fallback_clips'] += len(indices)
+
+            if clip_results is None:
+                clip_results = []
+                for index in indices:
+                    clip_results.append(stt.transcribe_audio(clip_paths[index], language_code, priority=priority))
+                    stats['requests'] += 1
+
+            for index, clip_result in zip(indices, clip_results):
+                if translate_to_english and clip_result['success']:
+                    clip_result = stt.translate_result(clip_result, priority=priority)
+                results[index] = clip_result
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    stats['requests_per_clip'] = stats['requests'] / stats['clips'] if stats['clips'] else 0.0
+    return {'results': results, 'stats': stats}
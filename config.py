@@ -7,6 +7,11 @@ load_dotenv()
 # Sarvam AI Configuration
 SARVAM_API_KEY = os.getenv('SARVAM_API_KEY')
 
+# Several subscription keys can be pooled: SARVAM_API_KEYS=key1,key2,key3
+SARVAM_API_KEYS = [key.strip() for key in os.getenv('SARVAM_API_KEYS', '').split(',') if key.strip()]
+if not SARVAM_API_KEYS and SARVAM_API_KEY:
+    SARVAM_API_KEYS = [SARVAM_API_KEY]
+
 # Supported languages by Sarvam AI
 SUPPORTED_LANGUAGES = {
     'Hindi': 'hi-IN',
@@ -25,6 +30,76 @@ SUPPORTED_LANGUAGES = {
 
 # Audio recording settings
 AUDIO_FORMAT = 16  # 16-bit
-AUDIO_CHANNELS = 1  # Mono
+AUDIO_CHANNELS = int(os.getenv('AUDIO_CHANNELS', '1'))  # 1 = mono, 2 = stereo (e.g. agent/customer)
 AUDIO_RATE = 16000  # 16kHz sample rate
 CHUNK_SIZE = 1024
+
+# Display names for channels of multi-channel audio, e.g. "Agent,Customer"
+CHANNEL_LABELS = [label.strip() for label in os.getenv('CHANNEL_LABELS', '').split(',') if label.strip()]
+
+# Local language identification
+SCRIPT_CONFIDENCE_THRESHOLD = 0.8  # Share of letters in one script to trust it
+# Consecutive auto-detections before a session pins its language (0 disables, the default)
+LANGUAGE_PIN_AFTER = int(os.getenv('SARVAM_LANGUAGE_PIN_AFTER', '0'))
+LANGUAGE_PIN_PROBE_EVERY = 5  # Every Nth request of a pinned session is auto-detected again
+
+# Request dispatching: lanes share one concurrency and rate budget.
+# Lower priority numbers are served first; a lane passed over `max_skip`
+# times while waiting is served next, so batch work still makes progress.
+MAX_CONCURRENT_REQUESTS = int(os.getenv('SARVAM_MAX_CONCURRENT', str(4 * max(1, len(SARVAM_API_KEYS)))))
+MAX_REQUESTS_PER_SECOND = float(os.getenv('SARVAM_MAX_RPS', '0')) or None
+DISPATCH_LANES = {
+    'interactive': {'priority': 0, 'max_skip': None},
+    'live': {'priority': 1, 'max_skip': 8},
+    'batch': {'priority': 2, 'max_skip': 4}
+}
+
+# Subtitle export
+SUBTITLE_WINDOW_SECONDS = 20  # Audio per transcription window
+SUBTITLE_MAX_IN_FLIGHT = 3  # Windows transcribed concurrently
+
+# Candidate-language hedging for uncertain auto-detect (opt-in)
+HEDGE_ENABLED = os.getenv('SARVAM_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+HEDGE_CONFIDENCE_THRESHOLD = 0.6  # Auto-detect confidence below which candidates are tried
+HEDGE_MAX_EXTRA_CALLS = 2  # Candidate transcriptions per request
+HEDGE_MAX_EXTRA_RATIO = 0.5  # Extra calls per hedged request over a session
+HEDGE_FALLBACK_LANGUAGES = ['hi-IN', 'en-IN']  # Tried when the transcript script gives no hint
+HEDGE_STAGGER_SECONDS = 0.3  # Delay before each further candidate starts, so a quick winner saves the rest
+
+# Offline spool for recordings made while the API is unreachable or throttled
+SPOOL_DIR = os.getenv('SARVAM_SPOOL_DIR', os.path.join(os.path.expanduser('~'), '.sarvam_spool'))
+SPOOL_MAX_WORKERS = 2  # Concurrent replays once the API is healthy again
+SPOOL_RETRY_INITIAL = 5  # Seconds before re-probing the API after a failure
+SPOOL_RETRY_MAX = 300  # Upper bound for the exponential backoff
+
+# Distributed batch workers (work_queue.py)
+WORKER_LEASE_SECONDS = 120  # Lease length; heartbeats renew it every third of this
+WORKER_CONCURRENCY = 4  # Jobs processed at once per worker process
+WORKER_MAX_ATTEMPTS = 3  # Expired leases before a job that keeps crashing workers is failed
+WORKER_POLL_SECONDS = 2  # Idle wait between polls of an empty queue
+
+# Acoustic fingerprint cache for near-duplicate audio (set a path to enable; needs NumPy)
+FINGERPRINT_INDEX_PATH = os.getenv('SARVAM_FINGERPRINT_INDEX')
+FINGERPRINT_SIMILARITY = 0.2  # Share of hashes that must align for a duplicate
+FINGERPRINT_MIN_MATCHES = 20  # Aligned hashes required regardless of clip length
+FINGERPRINT_MAX_POSTINGS = 2000  # Hashes stored more often than this are too common to vote on
+FINGERPRINT_LOOKUP_BUDGET = 5000  # Posting rows read per lookup, rarest hashes first
+
+# Transcript history
+HISTORY_DB_PATH = os.getenv('SARVAM_HISTORY_DB', os.path.join(os.path.expanduser('~'), '.sarvam_history.db'))
+
+# Packing short clips into one request (clip_packer.py)
+PACK_TARGET_SECONDS = 25  # Maximum packed duration, separators included
+PACK_GAP_SECONDS = 1.0  # Silence between packed clips
+PACK_MAX_CLIP_SECONDS = 5  # Longer clips are sent on their own
+PACK_BOUNDARY_TOLERANCE = 0.3  # Seconds a segment may spill past its clip into the gap
+PACK_SPEECH_LEVEL = 0.02  # RMS (share of full scale) above which a clip is expected to have a transcript
+
+# Upload audio while it is being recorded (single-channel recordings only)
+STREAMING_UPLOAD = os.getenv('SARVAM_STREAMING_UPLOAD', 'false').lower() in ('1', 'true', 'yes')
+
+# Multi-key pool health tracking
+KEY_LATENCY_SMOOTHING = 0.2  # Weight of the newest request in a key's average latency
+KEY_THROTTLE_COOLDOWN = 5  # Seconds a key rests after its first 429 (doubles on repeats)
+KEY_THROTTLE_COOLDOWN_MAX = 120  # Upper bound for a throttled key's rest
+KEY_INVALID_COOLDOWN = 600  # Seconds a rejected (401/403) key stays out of rotation
@@ -0,0 +1,128 @@
+"""
+Priority dispatcher that shares one concurrency and rate budget between lanes
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PriorityDispatcher:
+    """
+    Grants request slots to named priority lanes
+
+    Lanes are served in priority order (lower number first), so interactive
+    work jumps ahead of queued batch work. A lane with `max_skip` set is
+    guaranteed progress: once it has been passed over `max_skip` times while
+    waiting, it is served next regardless of priority.
+
+    All lanes share `max_concurrent` in-flight requests and, if set, a
+    `max_per_second` request rate.
+    """
+
+    def __init__(self, lanes, max_concurrent=4, max_per_second=None):
+        """
+        Args:
+            lanes (dict): Lane name -> {'priority': int, 'max_skip': int or None}
+            max_concurrent (int): Maximum requests in flight across all lanes
+            max_per_second (float): Maximum request starts per second (None for no limit)
+        """
+        self.lanes = lanes
+        self.max_concurrent = max_concurrent
+        self.max_per_second = max_per_second
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._last_start = 0.0
+        self._order = sorted(lanes, key=lambda name: lanes[name]['priority'])
+        self._queues = {name: deque() for name in lanes}
+        self._skipped = {name: 0 for name in lanes}
+        self._metrics = {
+            name: {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for name in lanes
+        }
+
+    @contextmanager
+    def slot(self, lane):
+        """Hold a request slot in `lane` for the duration of the block"""
+        self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, lane):
+        """Block until `lane` is granted a request slot"""
+        if lane not in self._queues:
+            raise ValueError(f"Unknown dispatch lane: {lane}")
+
+        ticket = object()
+        queued_at = time.monotonic()
+        with self._cond:
+            self._queues[lane].append(ticket)
+            while True:
+                if self._active < self.max_concurrent and self._next_ticket() is ticket:
+                    delay = self._rate_delay()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+
+            self._queues[lane].popleft()
+            self._active += 1
+            self._last_start = time.monotonic()
+            for name in self._order:
+                if name == lane:
+                    self._skipped[name] = 0
+                elif self._queues[name]:
+                    self._skipped[name] += 1
+
+            waited = self._last_start - queued_at
+            metrics = self._metrics[lane]
+            metrics['requests'] += 1
+            metrics['total_wait'] += waited
+            metrics['max_wait'] = max(metrics['max_wait'], waited)
+            self._cond.notify_all()
+
+    def release(self):
+        """Return a request slot to the shared budget"""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def get_metrics(self):
+        """
+        Return per-lane queue-wait metrics
+
+        Returns:
+            dict: Lane name -> requests, queued, average and max wait in seconds
+        """
+        with self._cond:
+            return {
+                name: {
+                    'requests': m['requests'],
+                    'queued': len(self._queues[name]),
+                    'avg_wait': m['total_wait'] / m['requests'] if m['requests'] else 0.0,
+                    'max_wait': m['max_wait']
+                }
+                for name, m in self._metrics.items()
+            }
+
+    def _next_ticket(self):
+        """Pick the ticket to serve next: starved lanes first, then by priority"""
+        for name in self._order:
+            max_skip = self.lanes[name].get('max_skip')
+            if self._queues[name] and max_skip is not None and self._skipped[name] >= max_skip:
+                return self._queues[name][0]
+        for name in self._order:
+            if self._queues[name]:
+                return self._queues[name][0]
+        return None
+
+    def _rate_delay(self):
+        """Seconds until the rate budget allows another request to start"""
+        if not self.max_per_second:
+            return 0
+        return self._last_start + 1.0 / self.max_per_second - time.monotonic()
@@ -0,0 +1,431 @@
+"""
+Acoustic fingerprints for reusing transcripts of re-encoded duplicate audio
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from audio_utils import read_wav
+from config import (
+    FINGERPRINT_SIMILARITY, FINGERPRINT_MIN_MATCHES, FINGERPRINT_MAX_POSTINGS, FINGERPRINT_LOOKUP_BUDGET
+)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Everything is fingerprinted at one rate, so resampled copies line up
+SAMPLE_RATE = 8000
+FFT_SIZE = 512
+HOP_SIZE = 256
+PEAK_NEIGHBORHOOD = (15, 9)  # (frequency bins, frames) a peak must dominate
+PEAK_RANGE = 4.0  # Natural-log magnitude below the loudest bin that still counts as a peak
+FAN_OUT = 10  # Peaks paired with each anchor peak
+MAX_DELTA_FRAMES = 63  # Fits the 6-bit time delta of a hash
+QUERY_SHIFTS = 4  # Sub-hop alignments tried at lookup, so padded copies still line up
+# Bit layout of the vote keys packed in FingerprintIndex._vote
+ALIGNMENT_BITS = 5
+DELTA_BITS = 24
+DELTA_RANGE = 1 << (DELTA_BITS - 1)
+
+
+def load_audio(audio_file_path):
+    """
+    Load audio as mono float samples at SAMPLE_RATE
+
+    WAV files are read directly; other formats are decoded with ffmpeg when
+    it is on the PATH.
+
+    Returns:
+        numpy.ndarray: Samples in [-1, 1], or None if the file cannot be decoded
+    """
+    try:
+        frames, channels, sample_width, rate = read_wav(audio_file_path)
+    except Exception:
+        return _load_with_ffmpeg(audio_file_path)
+
+    dtypes = {1: np.uint8, 2: np.int16, 4: np.int32}
+    if sample_width not in dtypes:
+        return _load_with_ffmpeg(audio_file_path)
+
+    samples = np.frombuffer(frames, dtype=dtypes[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128
+    samples /= float(2 ** (8 * sample_width - 1))
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+    if rate != SAMPLE_RATE and len(samples):
+        duration = len(samples) / rate
+        target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        samples = np.interp(target, np.arange(len(samples)) / rate, samples).astype(np.float32)
+    return samples
+
+
+def _load_with_ffmpeg(audio_file_path):
+    if not shutil.which("ffmpeg"):
+        return None
+    try:
+        raw = subprocess.run(
+            ["ffmpeg", "-v", "quiet", "-i", audio_file_path, "-f", "s16le", "-ac", "1",
+             "-ar", str(SAMPLE_RATE), "-"],
+            capture_output=True, check=True, timeout=60
+        ).stdout
+    except (subprocess.SubprocessError, OSError):
+        return None
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _spectrogram(samples):
+    """Log-magnitude STFT, shape (frequency bins, frames)"""
+    count = 1 + (len(samples) - FFT_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.as_strided(
+        samples,
+        shape=(count, FFT_SIZE),
+        strides=(samples.strides[0] * HOP_SIZE, samples.strides[0])
+    )
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FFT_SIZE), axis=1))
+    return np.log(spectrum.T + 1e-6)
+
+
+def _max_filter(values, size, axis):
+    """Sliding-window maximum along one axis, same shape as the input"""
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (size // 2, size // 2)
+    padded = np.pad(values, pad, mode="constant", constant_values=-np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, size, axis=axis)
+    return windows.max(axis=-1)
+
+
+def _find_peaks(spectrogram):
+    """Return (frame, bin) arrays of local maxima within PEAK_RANGE of the loudest, sorted by frame"""
+    local_max = _max_filter(_max_filter(spectrogram, PEAK_NEIGHBORHOOD[0], 0), PEAK_NEIGHBORHOOD[1], 1)
+    bins, frames = np.nonzero((spectrogram == local_max) & (spectrogram > spectrogram.max() - PEAK_RANGE))
+    order = np.lexsort((bins, frames))
+    return frames[order], bins[order]
+
+
+def fingerprint_samples(samples):
+    """
+    Build landmark hashes from audio samples
+
+    Each hash packs an anchor peak's frequency, a nearby peak's frequency and
+    their time distance into 24 bits; the anchor's frame is kept as offset.
+
+    Returns:
+        tuple: (hashes, offsets) as int64 arrays
+    """
+    if samples is None or len(samples) < FFT_SIZE:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    frames, bins = _find_peaks(_spectrogram(np.ascontiguousarray(samples, dtype=np.float32)))
+    hashes, offsets = [], []
+    for step in range(1, FAN_OUT + 1):
+        anchor_frames, target_frames = frames[:-step], frames[step:]
+        delta = target_frames - anchor_frames
+        valid = (delta > 0) & (delta <= MAX_DELTA_FRAMES)
+        anchor_bins, target_bins = bins[:-step][valid], bins[step:][valid]
+        hashes.append((anchor_bins.astype(np.int64) << 15) | (target_bins.astype(np.int64) << 6) | delta[valid])
+        offsets.append(anchor_frames[valid].astype(np.int64))
+
+    if not hashes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(offsets)
+
+
+def fingerprint_file(audio_file_path, shifts=QUERY_SHIFTS):
+    """
+    Fingerprint an audio file at several sub-hop alignments
+
+    Extra silence rarely shifts audio by a whole number of frames, so
+    lookups compare against fingerprints taken at `shifts` evenly spaced
+    offsets within one hop. The first fingerprint is unshifted and is the
+    one to store in the index.
+
+    Returns:
+        list: (hashes, offsets) tuples, or None if NumPy or a decoder is missing
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    samples = load_audio(audio_file_path)
+    if samples is None:
+        return None
+    step = HOP_SIZE // max(1, shifts)
+    return [fingerprint_samples(samples[shift * step:]) for shift in range(max(1, shifts))]
+
+
+class FingerprintIndex:
+    """
+    Inverted index from landmark hashes to stored transcription results
+
+    Hashes live in a clustered SQLite table keyed by hash, with a posting
+    count per hash, so a lookup reads the rarest query hashes first and
+    skips hashes too common to tell clips apart. Candidates are scored by
+    the largest group of hashes that agree on one time offset, which
+    tolerates added silence, relative to the larger of the two clips, so an
+    excerpt and the recording it was cut from do not match each other.
+    """
+
+    def __init__(self, db_path):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is not available. Please install it to use fingerprint caching.")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clips (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cache_key TEXT NOT NULL,
+                    hash_count INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    hash INTEGER NOT NULL,
+                    clip_id INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    PRIMARY KEY (hash, clip_id, offset)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hash_counts (
+                    hash INTEGER PRIMARY KEY,
+                    postings INTEGER NOT NULL
+                )
+            """)
+            # Indexes built before posting counts were kept
+            if not conn.execute("SELECT 1 FROM hash_counts LIMIT 1").fetchone():
+                conn.execute("INSERT INTO hash_counts (hash, postings) SELECT hash, COUNT(*) FROM hashes GROUP BY hash")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, fingerprint, result, cache_key=""):
+        """
+        Store a transcription result under a fingerprint
+
+        Args:
+            fingerprint (tuple): (hashes, offsets) from fingerprint_file
+            result (dict): Transcription result to reuse
+            cache_key (str): Request options the result depends on
+
+        Returns:
+            int: Clip id
+        """
+        hashes, offsets = fingerprint
+        postings = np.unique(np.stack([hashes, offsets]), axis=1) if len(hashes) else np.zeros((2, 0), np.int64)
+        counted, counts = np.unique(postings[0], return_counts=True)
+        with self._lock, self._connect() as conn:
+            clip_id = conn.execute(
+                "INSERT INTO clips (cache_key, hash_count, result, created_at) VALUES (?, ?, ?, ?)",
+                (cache_key, len(hashes), json.dumps(result, ensure_ascii=False), time.time())
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO hashes (hash, clip_id, offset) VALUES (?, ?, ?)",
+                zip(postings[0].tolist(), [clip_id] * postings.shape[1], postings[1].tolist())
+            )
+            conn.executemany(
+                "INSERT INTO hash_counts (hash, postings) VALUES (?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET postings = postings + excluded.postings",
+                zip(counted.tolist(), counts.tolist())
+            )
+        return clip_id
+
+    def lookup(self, fingerprints, cache_key="", threshold=FINGERPRINT_SIMILARITY,
+               max_postings=FINGERPRINT_MAX_POSTINGS, budget=FINGERPRINT_LOOKUP_BUDGET):
+        """
+        Find a stored clip that sounds like the query
+
+        Args:
+            fingerprints (list): (hashes, offsets) tuples from fingerprint_file
+            cache_key (str): Request options the stored result must match
+            threshold (float): Minimum share of aligned hashes, relative to the larger clip
+            max_postings (int): Hashes stored more often than this are skipped (stop-list)
+            budget (int): Maximum posting rows read, rarest hashes first
+
+        Returns:
+            dict: {'clip_id', 'similarity', 'result'} of the best match, or None
+        """
+        fingerprints = [(hashes, offsets) for hashes, offsets in fingerprints]
+        sizes = np.array([len(hashes) for hashes, _ in fingerprints], dtype=np.float64)
+        if not sizes.sum():
+            return None
+        query_hashes = np.concatenate([hashes for hashes, _ in fingerprints])
+        query_offsets = np.concatenate([offsets for _, offsets in fingerprints])
+        query_alignments = np.repeat(np.arange(len(fingerprints)), sizes.astype(np.int64))
+
+        with self._connect() as conn:
+            counts = {}
+            unique = np.unique(query_hashes).tolist()
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                counts.update(conn.execute(
+                    f"SELECT hash, postings FROM hash_counts WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall())
+
+            # Rarest hashes first, within the row budget
+            ranked = sorted(counts, key=counts.get)
+            selected = []
+            for h in ranked:
+                if counts[h] > max_postings or counts[h] > budget:
+                    break
+                selected.append(h)
+                budget -= counts[h]
+            if not selected:
+                return None
+            skipped = ranked[len(selected):]
+
+            rows = []
+            for start in range(0, len(selected), 500):
+                chunk = selected[start:start + 500]
+                rows.extend(conn.execute(
+                    f"SELECT hash, clip_id, offset FROM hashes WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall())
+            best = self._vote(np.array(rows, dtype=np.int64).reshape(-1, 3), query_hashes, query_offsets,
+                              query_alignments)
+
+            # Skipped hashes cannot vote, so scale each alignment's size to the hashes that could
+            used = ~np.isin(query_hashes, np.array(skipped, dtype=np.int64))
+            fractions = np.bincount(query_alignments[used], minlength=len(sizes)) / np.maximum(sizes, 1)
+
+            for clip_id, alignment, matches in best:
+                if matches < FINGERPRINT_MIN_MATCHES:
+                    break
+                row = conn.execute(
+                    "SELECT hash_count, result FROM clips WHERE id = ? AND cache_key = ?",
+                    (clip_id, cache_key)
+                ).fetchone()
+                if not row:
+                    continue
+                similarity = matches / max(1.0, max(sizes[alignment], row[0]) * fractions[alignment])
+                if similarity >= threshold:
+                    return {'clip_id': clip_id, 'similarity': float(similarity), 'result': json.loads(row[1])}
+        return None
+
+    @staticmethod
+    def _vote(postings, query_hashes, query_offsets, query_alignments, limit=5):
+        """
+        Count hashes agreeing on one (clip, alignment, time offset)
+
+        Returns:
+            list: (clip_id, alignment, votes) of the best group of the `limit`
+                  best clips, most votes first
+        """
+        if not len(postings):
+            return []
+        order = np.argsort(query_hashes, kind="stable")
+        sorted_hashes = query_hashes[order]
+        first = np.searchsorted(sorted_hashes, postings[:, 0], side="left")
+        repeats = np.searchsorted(sorted_hashes, postings[:, 0], side="right") - first
+
+        # Pair every posting with every query entry of the same hash
+        posting_index = np.repeat(np.arange(len(postings)), repeats)
+        query_index = order[np.repeat(first, repeats)
+                            + np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)]
+
+        # Pack (clip, alignment, offset difference) into one integer per pair
+        deltas = np.clip(postings[posting_index, 2] - query_offsets[query_index], -DELTA_RANGE, DELTA_RANGE - 1)
+        keys = ((postings[posting_index, 1] << (DELTA_BITS + ALIGNMENT_BITS))
+                | (query_alignments[query_index].astype(np.int64) << DELTA_BITS)
+                | (deltas + DELTA_RANGE))
+        keys, votes = np.unique(keys, return_counts=True)
+
+        # Keep the largest group per clip, then the best clips
+        clip_ids = keys >> (DELTA_BITS + ALIGNMENT_BITS)
+        ranked = np.lexsort((votes, clip_ids))
+        last = np.append(clip_ids[ranked[1:]] != clip_ids[ranked[:-1]], True)
+        best = ranked[last]
+        best = best[np.argsort(-votes[best], kind="stable")[:limit]]
+        return [
+            (int(clip_ids[i]), int((keys[i] >> DELTA_BITS) & ((1 << ALIGNMENT_BITS) - 1)), int(votes[i]))
+            for i in best
+        ]
+
+    def count(self):
+        """Return the number of indexed clips"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+
+
+def benchmark(db_path, clips=20000, hashes_per_clip=300, vocabulary=50000, seed=0):
+    """
+    Time lookups against a synthetic index of clips sharing one hash vocabulary
+
+    Hashes are drawn from a small `vocabulary`, so many clips share every
+    hash, as in a large index. The first clip is queried back to check that
+    common hashes do not drown out the true match.
+
+    Returns:
+        dict: Index size, lookup timings in milliseconds and the matched clip id
+    """
+    rng = np.random.default_rng(seed)
+    index = FingerprintIndex(db_path)
+    with index._connect() as conn:
+        postings = {}
+        for clip in range(clips):
+            hashes = rng.integers(0, vocabulary, hashes_per_clip)
+            offsets = np.sort(rng.integers(0, 2000, hashes_per_clip))
+            clip_id = conn.execute(
+                "INSERT INTO clips (cache_key, hash_count, result, created_at) VALUES ('', ?, ?, ?)",
+                (hashes_per_clip, json.dumps({'transcript': f"clip {clip}"}), time.time())
+            ).lastrowid
+            if clip == 0:
+                query = (hashes, offsets)
+            conn.executemany("INSERT OR IGNORE INTO hashes (hash, clip_id, offset) VALUES (?, ?, ?)",
+                             zip(hashes.tolist(), [clip_id] * hashes_per_clip, offsets.tolist()))
+            for h in hashes.tolist():
+                postings[h] = postings.get(h, 0) + 1
+        conn.executemany(
+            "INSERT INTO hash_counts (hash, postings) VALUES (?, ?) "
+            "ON CONFLICT(hash) DO UPDATE SET postings = postings + excluded.postings",
+            postings.items()
+        )
+
+    # Query with a shifted copy of the first clip, at four alignments like fingerprint_file
+    fingerprints = [(query[0], query[1] + 40)] * QUERY_SHIFTS
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        match = index.lookup(fingerprints)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'clips': index.count(),
+        'median_ms': timings[len(timings) // 2],
+        'max_ms': timings[-1],
+        'matched_clip': match and match['clip_id']
+    }
+
+
+def main():
+    """Command line entry point: python fingerprint.py benchmark index.db"""
+    parser = argparse.ArgumentParser(description="Acoustic fingerprint index tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("benchmark", help="Time lookups against a synthetic index")
+    bench.add_argument("db", help="Database to create (use a new file)")
+    bench.add_argument("--clips", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(benchmark(args.db, clips=args.clips))
+
+
+if __name__ == "__main__":
+    main()
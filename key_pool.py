@@ -0,0 +1,203 @@
+"""
+Pool of Sarvam API subscription keys with per-key health and quota tracking
+"""
+
+import threading
+import time
+
+from config import KEY_LATENCY_SMOOTHING, KEY_THROTTLE_COOLDOWN, KEY_THROTTLE_COOLDOWN_MAX, KEY_INVALID_COOLDOWN
+
+# Response headers that may carry the remaining request quota
+QUOTA_HEADERS = ('x-ratelimit-remaining', 'ratelimit-remaining', 'x-ratelimit-remaining-requests')
+
+
+def mask_key(key):
+    """Show only the last four characters of a key"""
+    return f"...{key[-4:]}" if len(key) > 4 else "..."
+
+
+class KeyPool:
+    """
+    Spreads requests across several subscription keys
+
+    Each request goes to the healthy key with the fewest requests in flight,
+    preferring keys with more remaining quota and lower latency. Keys that
+    are throttled (429) rest for the Retry-After time or an exponential
+    backoff, both capped at KEY_THROTTLE_COOLDOWN_MAX, and then take one
+    probe request at a time until it succeeds; keys that are rejected
+    (401/403) rest for KEY_INVALID_COOLDOWN. Nothing here waits: when every
+    key is resting, acquire() returns None, except that when every key was
+    rejected one is used anyway so the caller sees the authentication error.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(dict.fromkeys(keys))
+        self._lock = threading.Lock()
+        self._state = {
+            key: {
+                'in_flight': 0,
+                'requests': 0,
+                'successes': 0,
+                'throttled': 0,
+                'rejected': 0,
+                'errors': 0,
+                'consecutive_throttles': 0,
+                'latency': None,
+                'remaining_quota': None,
+                'cooldown_until': 0.0,
+                'throttled_until': 0.0,
+                'last_error': None
+            }
+            for key in self.keys
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def acquire(self, exclude=(), fallback=True):
+        """
+        Pick a key for the next request without waiting
+
+        Args:
+            exclude (tuple): Keys not to use, e.g. one that just failed
+            fallback (bool): If every key was rejected, return the one that rests least
+                             instead of None, so the caller sees the authentication error
+
+        Returns:
+            str: API key (release it with release() when the request ends), or None
+                 when every key is resting; retry_after() says for how long
+        """
+        if not self.keys:
+            raise ValueError("Sarvam API key not found. Please set SARVAM_API_KEY in your .env file")
+
+        now = time.monotonic()
+        with self._lock:
+            candidates = [key for key in self.keys if key not in exclude]
+            healthy = [key for key in candidates if self._available(key, now)]
+            if healthy:
+                key = min(healthy, key=self._load)
+            elif fallback and candidates and not any(self._throttled(k, now) for k in candidates):
+                key = min(candidates, key=lambda k: self._state[k]['cooldown_until'])
+            else:
+                return None
+            state = self._state[key]
+            state['in_flight'] += 1
+            state['requests'] += 1
+            return key
+
+    def retry_after(self):
+        """
+        Seconds until a throttled key takes requests again
+
+        Returns:
+            float: Time until the first throttled key recovers, 0.0 if none is throttled
+        """
+        now = time.monotonic()
+        with self._lock:
+            waits = [max(0.0, state['throttled_until'] - now)
+                     for key, state in self._state.items() if self._throttled(key, now)]
+        return min(waits, default=0.0)
+
+    def _available(self, key, now):
+        # A key recovering from throttling takes one probe request at a time
+        # until a response shows the throttling is over
+        state = self._state[key]
+        return state['cooldown_until'] <= now and not (state['consecutive_throttles'] and state['in_flight'])
+
+    def _throttled(self, key, now):
+        state = self._state[key]
+        return state['throttled_until'] > now or bool(state['consecutive_throttles'] and state['in_flight'])
+
+    def _load(self, key):
+        state = self._state[key]
+        quota = state['remaining_quota']
+        return (
+            state['in_flight'],
+            quota is not None and quota <= 0,
+            -(quota if quota is not None else float('inf')),
+            state['latency'] or 0.0
+        )
+
+    def release(self, key, status_code=None, latency=None, headers=None, error=None):
+        """
+        Record the outcome of a request made with `key`
+
+        Args:
+            key (str): Key returned by acquire()
+            status_code (int): HTTP status, or None if no response arrived
+            latency (float): Request duration in seconds
+            headers (dict): Response headers, used for quota and Retry-After
+            error (str): Error description when no response arrived
+        """
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        now = time.monotonic()
+        with self._lock:
+            state = self._state[key]
+            state['in_flight'] -= 1
+
+            if latency is not None and status_code is not None:
+                if state['latency'] is None:
+                    state['latency'] = latency
+                else:
+                    state['latency'] += KEY_LATENCY_SMOOTHING * (latency - state['latency'])
+
+            for name in QUOTA_HEADERS:
+                if name in headers:
+                    try:
+                        state['remaining_quota'] = int(float(headers[name]))
+                    except ValueError:
+                        pass
+                    break
+
+            if status_code is None:
+                state['errors'] += 1
+                state['last_error'] = error
+            elif status_code == 429:
+                state['throttled'] += 1
+                state['consecutive_throttles'] += 1
+                cooldown = min(KEY_THROTTLE_COOLDOWN * 2 ** (state['consecutive_throttles'] - 1),
+                               KEY_THROTTLE_COOLDOWN_MAX)
+                try:
+                    cooldown = min(float(headers.get('retry-after', cooldown)), KEY_THROTTLE_COOLDOWN_MAX)
+                except ValueError:
+                    pass
+                state['cooldown_until'] = state['throttled_until'] = now + cooldown
+                state['last_error'] = "Throttled (429)"
+            elif status_code in (401, 403):
+                state['rejected'] += 1
+                state['cooldown_until'] = now + KEY_INVALID_COOLDOWN
+                state['throttled_until'] = 0.0
+                state['last_error'] = f"Rejected ({status_code})"
+            else:
+                state['consecutive_throttles'] = 0
+                if status_code < 400:
+                    state['successes'] += 1
+                else:
+                    state['errors'] += 1
+                    state['last_error'] = f"HTTP {status_code}"
+
+    def usage(self):
+        """
+        Report per-key usage
+
+        Returns:
+            dict: Key number and masked key -> requests, successes, throttled, rejected, errors,
+                  in_flight, average latency, remaining quota and cooldown seconds
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                f"#{index + 1} {mask_key(key)}": {
+                    'requests': state['requests'],
+                    'successes': state['successes'],
+                    'throttled': state['throttled'],
+                    'rejected': state['rejected'],
+                    'errors': state['errors'],
+                    'in_flight': state['in_flight'],
+                    'avg_latency': state['latency'],
+                    'remaining_quota': state['remaining_quota'],
+                    'cooldown_seconds': max(0.0, state['cooldown_until'] - now),
+                    'last_error': state['last_error']
+                }
+                for index, (key, state) in enumerate(self._state.items())
+            }
@@ -0,0 +1,220 @@
+"""
+Local script-based language identification for transcripts
+"""
+
+import threading
+
+from config import LANGUAGE_PIN_AFTER, LANGUAGE_PIN_PROBE_EVERY
+
+# Unicode blocks of the scripts Sarvam AI transcribes into. Devanagari is
+# shared by Hindi and Marathi, so it maps to more than one language.
+SCRIPT_RANGES = {
+    'Devanagari': [(0x0900, 0x097F)],
+    'Bengali': [(0x0980, 0x09FF)],
+    'Gurmukhi': [(0x0A00, 0x0A7F)],
+    'Gujarati': [(0x0A80, 0x0AFF)],
+    'Odia': [(0x0B00, 0x0B7F)],
+    'Tamil': [(0x0B80, 0x0BFF)],
+    'Telugu': [(0x0C00, 0x0C7F)],
+    'Kannada': [(0x0C80, 0x0CFF)],
+    'Malayalam': [(0x0D00, 0x0D7F)],
+    'Latin': [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)],
+}
+
+SCRIPT_LANGUAGES = {
+    'Latin': ['en-IN'],
+    'Devanagari': ['hi-IN', 'mr-IN'],
+    'Bengali': ['bn-IN'],
+    'Gurmukhi': ['pa-IN'],
+    'Gujarati': ['gu-IN'],
+    'Odia': ['od-IN'],
+    'Tamil': ['ta-IN'],
+    'Telugu': ['te-IN'],
+    'Kannada': ['kn-IN'],
+    'Malayalam': ['ml-IN'],
+}
+
+LANGUAGE_SCRIPTS = {
+    language: script
+    for script, languages in SCRIPT_LANGUAGES.items()
+    for language in languages
+}
+
+# Letters that are common in Marathi text but rare in Hindi
+MARATHI_HINTS = ('ळ',)
+
+# Script tags are drawn from the Private Use Area so they never collide
+# with real transcript text; any such characters in the input are dropped.
+_TAG_BASE = 0xE000
+
+
+def _build_script_table():
+    """Map every codepoint of a known script to a one-character script tag"""
+    table = {}
+    tags = {}
+    for index, (script, ranges) in enumerate(SCRIPT_RANGES.items()):
+        tag = chr(_TAG_BASE + index)
+        tags[tag] = script
+        table[ord(tag)] = None
+        for start, end in ranges:
+            for codepoint in range(start, end + 1):
+                table[codepoint] = tag
+    return table, tags
+
+
+_SCRIPT_TABLE, _SCRIPT_TAGS = _build_script_table()
+
+
+def count_scripts(text):
+    """
+    Count the letters of each known script in a text
+
+    The text is mapped to script tags with a single str.translate pass and
+    the tags are tallied with str.count, so the per-character work stays in C.
+
+    Args:
+        text (str): Text to inspect
+
+    Returns:
+        dict: Letter count per script name (scripts with no letters omitted)
+    """
+    tagged = text.translate(_SCRIPT_TABLE)
+    counts = {}
+    for tag, script in _SCRIPT_TAGS.items():
+        count = tagged.count(tag)
+        if count:
+            counts[script] = count
+    return counts
+
+
+def classify_text(text):
+    """
+    Identify the dominant script of a transcript and the languages it implies
+
+    Args:
+        text (str): Transcript text
+
+    Returns:
+        dict: 'script', 'language_code' (best guess or 'unknown'),
+              'candidates' (possible language codes) and 'confidence'
+              (share of letters in the dominant script, 0-1)
+    """
+    counts = count_scripts(text)
+    total = sum(counts.values())
+    if not total:
+        return {
+            'script': None,
+            'language_code': 'unknown',
+            'candidates': [],
+            'confidence': 0.0
+        }
+
+    script = max(counts, key=counts.get)
+    candidates = list(SCRIPT_LANGUAGES[script])
+    if script == 'Devanagari' and any(hint in text for hint in MARATHI_HINTS):
+        candidates.reverse()
+
+    return {
+        'script': script,
+        'language_code': candidates[0],
+        'candidates': candidates,
+        'confidence': counts[script] / total
+    }
+
+
+def script_matches_language(text, language_code, min_confidence=0.5):
+    """Check whether a transcript is written in the script of a language"""
+    expected = LANGUAGE_SCRIPTS.get(language_code)
+    if not expected:
+        return True
+    classification = classify_text(text)
+    if classification['script'] is None:
+        return True
+    return classification['script'] == expected and classification['confidence'] >= min_confidence
+
+
+class SessionLanguageTracker:
+    """
+    Pins one caller's session to a language once auto-detection has been stable
+
+    After `pin_after` consecutive auto-detected results in the same language
+    (and in that language's script) the language is pinned, so later
+    'unknown' requests of the session can name it explicitly. A pinned
+    request is answered in the pinned language whatever was spoken, so
+    every `probe_every`-th request is sent as auto-detect again; a probe
+    that detects a different language releases the pin.
+
+    Keep one tracker per speaker or conversation; a tracker shared by
+    unrelated callers pins all of them to whoever spoke first.
+    """
+
+    def __init__(self, pin_after=LANGUAGE_PIN_AFTER, probe_every=LANGUAGE_PIN_PROBE_EVERY):
+        self.pin_after = pin_after
+        self.probe_every = probe_every
+        self.pinned_language = None
+        self._candidate = None
+        self._streak = 0
+        self._since_probe = 0
+        self._lock = threading.Lock()
+
+    def request_language(self, language_code):
+        """
+        Return the language code to send for a request
+
+        Explicit languages pass through. Auto-detect becomes the pinned
+        language, except on probe requests, which stay 'unknown'.
+        """
+        if language_code != 'unknown':
+            return language_code
+        with self._lock:
+            if not self.pinned_language:
+                return language_code
+            self._since_probe += 1
+            if self.probe_every and self._since_probe >= self.probe_every:
+                self._since_probe = 0
+                return language_code
+            return self.pinned_language
+
+    def observe(self, language_code, transcript):
+        """
+        Record the result of a request that was sent as auto-detect
+
+        Results of pinned requests must not be passed in: they are in the
+        pinned language by construction and say nothing about the speaker.
+        """
+        if not transcript.strip():
+            return
+
+        with self._lock:
+            detected = (language_code not in (None, '', 'unknown')
+                        and script_matches_language(transcript, language_code))
+            if self.pinned_language:
+                if detected and language_code == self.pinned_language:
+                    return
+                self._reset()
+
+            if not self.pin_after or not detected:
+                self._candidate = None
+                self._streak = 0
+                return
+
+            if language_code == self._candidate:
+                self._streak += 1
+            else:
+                self._candidate = language_code
+                self._streak = 1
+
+            if self._streak >= self.pin_after:
+                self.pinned_language = language_code
+                self._since_probe = 0
+
+    def reset(self):
+        """Forget the pinned language and start detecting again"""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.pinned_language = None
+        self._candidate = None
+        self._streak = 0
+        self._since_probe = 0
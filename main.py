@@ -1,10 +1,15 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+from tkinter import ttk, scrolledtext, messagebox, filedialog, simpledialog
 import threading
+import time
 import os
 from audio_recorder import AudioRecorder
 from sarvam_client import SarvamSTT
-from config import SUPPORTED_LANGUAGES
+from spool import RecordingSpool, SpoolDrainer
+from transcript_history import TranscriptHistory
+from audio_utils import wav_channels
+from language_id import SessionLanguageTracker
+from config import SUPPORTED_LANGUAGES, HEDGE_ENABLED, STREAMING_UPLOAD, AUDIO_RATE
 
 class SpeechToTextApp:
     def __init__(self, root):
@@ -22,7 +27,24 @@ class SpeechToTextApp:
             self.audio_available = False
             
         self.stt_client = SarvamSTT()
+        # Auto-detect pinning follows this GUI session's speaker only (opt-in via config)
+        self.language_session = SessionLanguageTracker()
+        self.history = TranscriptHistory()
         self.is_recording = False
+        self.stream_thread = None
+        self.stream_result = None
+        self.stop_time = None
+        self.latency_stats = {}
+        
+        # Recordings made while the API is down are spooled and replayed later
+        self.spool = RecordingSpool()
+        self.spool_drainer = SpoolDrainer(
+            self.spool,
+            self.stt_client,
+            on_result=lambda item, result: self.root.after(0, lambda: self.display_result(result)),
+            priority="live"
+        )
+        self.spool_drainer.start()
         
         # Setup GUI
         self.setup_ui()
@@ -122,6 +144,20 @@ class SpeechToTextApp:
         )
         self.clear_btn.pack(side='left', padx=10)
         
+        self.search_btn = tk.Button(
+            control_frame,
+            text="🔍 Search History",
+            command=self.search_history,
+            font=('Arial', 12),
+            bg='#8e44ad',
+            fg='white',
+            padx=20,
+            pady=10,
+            relief='raised',
+            borderwidth=2
+        )
+        self.search_btn.pack(side='left', padx=10)
+        
         # Status label
         self.status_label = tk.Label(
             self.root,
@@ -191,8 +227,24 @@ class SpeechToTextApp:
     def start_recording(self):
         """Start audio recording"""
         try:
-            if self.recorder.start_recording():
+            language_code = SUPPORTED_LANGUAGES.get(self.language_var.get(), "unknown")
+            streaming = (
+                STREAMING_UPLOAD
+                and self.recorder.channels == 1
+                and not (HEDGE_ENABLED and language_code == "unknown")
+                and not self.spool.pending_count()
+            )
+            if self.recorder.start_recording(stream=streaming):
                 self.is_recording = True
+                if streaming:
+                    # Upload while the user is speaking; only the tail is left at Stop
+                    self.stream_result = None
+                    self.stream_thread = threading.Thread(
+                        target=self.stream_upload,
+                        args=(language_code, self.translate_var.get()),
+                        daemon=True
+                    )
+                    self.stream_thread.start()
                 self.record_btn.config(
                     text="⏹️ Stop Recording",
                     bg='#e74c3c'
@@ -209,6 +261,7 @@ class SpeechToTextApp:
         """Stop audio recording and process"""
         if self.is_recording:
             self.is_recording = False
+            self.stop_time = time.monotonic()
             self.record_btn.config(
                 text="🎙️ Start Recording",
                 bg='#27ae60'
@@ -227,9 +280,25 @@ class SpeechToTextApp:
         try:
             # Stop recording and save to file
             frames = self.recorder.stop_recording()
+            
+            if self.stream_thread:
+                self.stream_thread.join()
+                self.stream_thread = None
+                result = self.stream_result
+                if result and result['success']:
+                    self.record_latency(result, "streaming")
+                    self.root.after(0, lambda: self.display_result(result))
+                    return
+                # Fall back to uploading the saved recording
+                if result:
+                    print(f"Streaming upload failed, uploading saved recording: {result.get('error')}")
+                latency_mode = "streaming_fallback"
+            else:
+                latency_mode = "save_then_upload"
+            
             if frames:
                 audio_file = self.recorder.save_audio("temp_recording.wav")
-                self.transcribe_audio(audio_file)
+                self.transcribe_audio(audio_file, latency_mode)
                 
                 # Clean up temporary file
                 if os.path.exists(audio_file):
@@ -242,6 +311,30 @@ class SpeechToTextApp:
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to process recording: {str(e)}"))
     
+    def stream_upload(self, language_code, translate_to_english):
+        """Transcribe the recording through a streaming upload while it is recorded"""
+        self.stream_result = self.stt_client.transcribe_stream(
+            self.recorder.iter_chunks(),
+            self.recorder.channels,
+            self.recorder.get_sample_width(),
+            AUDIO_RATE,
+            language_code,
+            translate_to_english=translate_to_english,
+            session=self.language_session
+        )
+    
+    def record_latency(self, result, mode):
+        """Record how long after Stop a recording's result arrived"""
+        if self.stop_time is None:
+            return
+        latency = time.monotonic() - self.stop_time
+        self.stop_time = None
+        samples = self.latency_stats.setdefault(mode, [])
+        samples.append(latency)
+        result['stop_to_result_seconds'] = latency
+        print(f"⏱️ Stop-to-result ({mode}): {latency:.2f}s "
+              f"(average {sum(samples) / len(samples):.2f}s over {len(samples)})")
+    
     def upload_audio_file(self):
         """Upload and process an audio file"""
         file_path = filedialog.askopenfilename(
@@ -255,6 +348,7 @@ class SpeechToTextApp:
         )
         
         if file_path:
+            self.stop_time = None
             self.status_label.config(
                 text="⏳ Processing uploaded file...",
                 fg='#f39c12'
@@ -262,7 +356,7 @@ class SpeechToTextApp:
             # Process in separate thread
             threading.Thread(target=lambda: self.transcribe_audio(file_path), daemon=True).start()
     
-    def transcribe_audio(self, audio_file_path):
+    def transcribe_audio(self, audio_file_path, latency_mode="save_then_upload"):
         """Transcribe audio using Sarvam AI"""
         try:
             # Get selected language and translation preference
@@ -270,12 +364,31 @@ class SpeechToTextApp:
             language_code = SUPPORTED_LANGUAGES.get(selected_lang, "unknown")
             translate_to_english = self.translate_var.get()
             
-            # Call Sarvam AI API
-            result = self.stt_client.transcribe_audio(
-                audio_file_path, 
-                language_code, 
-                translate_to_english=translate_to_english
-            )
+            # Keep arrival order: while older recordings are spooled, queue behind them
+            if self.spool.pending_count():
+                self.spool_audio(audio_file_path, language_code, translate_to_english)
+                return
+            
+            # Call Sarvam AI API (multi-channel WAVs are transcribed per channel)
+            if HEDGE_ENABLED and language_code == "unknown" and wav_channels(audio_file_path) <= 1:
+                result = self.stt_client.transcribe_with_hedging(
+                    audio_file_path,
+                    translate_to_english=translate_to_english
+                )
+            else:
+                result = self.stt_client.transcribe_multichannel(
+                    audio_file_path, 
+                    language_code, 
+                    translate_to_english=translate_to_english,
+                    session=self.language_session
+                )
+            
+            if not result['success'] and result.get('retryable'):
+                self.spool_audio(audio_file_path, language_code, translate_to_english)
+                return
+            
+            # Fallbacks after a failed stream include the wait on it, so they are kept apart
+            self.record_latency(result, latency_mode)
             
             # Update UI in main thread
             self.root.after(0, lambda: self.display_result(result))
@@ -287,6 +400,20 @@ class SpeechToTextApp:
                 fg='#e74c3c'
             ))
     
+    def spool_audio(self, audio_file_path, language_code, translate_to_english):
+        """Save audio to the offline spool to be transcribed when the API is back"""
+        self.spool.enqueue(
+            audio_file_path,
+            language_code=language_code,
+            translate_to_english=translate_to_english
+        )
+        self.spool_drainer.notify()
+        pending = self.spool.pending_count()
+        self.root.after(0, lambda: self.status_label.config(
+            text=f"📥 API unavailable - audio saved, will transcribe when back online ({pending} queued)",
+            fg='#f39c12'
+        ))
+    
     def display_result(self, result):
         """Display transcription result"""
         if result['success']:
@@ -308,8 +435,17 @@ class SpeechToTextApp:
                 # Insert at the beginning
                 self.output_text.insert('1.0', display_text)
                 
+                # Keep every result searchable after Clear or restart
+                try:
+                    self.history.add_result(result)
+                except Exception as e:
+                    print(f"Failed to save transcript history: {e}")
+                
+                status_text = "✅ Transcription completed successfully!"
+                if 'stop_to_result_seconds' in result:
+                    status_text += f" ({result['stop_to_result_seconds']:.1f}s after stop)"
                 self.status_label.config(
-                    text="✅ Transcription completed successfully!",
+                    text=status_text,
                     fg='#27ae60'
                 )
             else:
@@ -325,6 +461,34 @@ class SpeechToTextApp:
                 fg='#e74c3c'
             )
     
+    def search_history(self):
+        """Search past transcripts and show the matches"""
+        query = simpledialog.askstring("Search History", "Search past transcripts (any language):", parent=self.root)
+        if not query or not query.strip():
+            return
+        
+        matches = self.history.search(query)
+        if not matches:
+            self.status_label.config(
+                text=f"🔍 No transcripts found for '{query}'",
+                fg='#f39c12'
+            )
+            return
+        
+        display_text = f"🔍 Search results for '{query}':\n\n"
+        for item in matches:
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(item['created_at']))
+            display_text += f"[{when}] [{item['language'] or 'unknown'}] {item['original']}\n"
+            if item['english'] and item['english'] != item['original']:
+                display_text += f"    🌐 {item['english']}\n"
+        display_text += "\n" + "="*50 + "\n\n"
+        
+        self.output_text.insert('1.0', display_text)
+        self.status_label.config(
+            text=f"🔍 Found {len(matches)} transcript(s)",
+            fg='#27ae60'
+        )
+    
     def clear_output(self):
         """Clear the output text area"""
         self.output_text.delete('1.0', tk.END)
@@ -370,13 +534,14 @@ class SpeechToTextApp:
         
         if self.recorder:
             self.recorder.cleanup()
+        self.spool_drainer.stop()
         self.root.destroy()
 
 def main():
     """Main function to run the application"""
     # Check if API key is configured
-    from config import SARVAM_API_KEY
-    if not SARVAM_API_KEY:
+    from config import SARVAM_API_KEYS
+    if not SARVAM_API_KEYS:
         root = tk.Tk()
         root.withdraw()  # Hide the main window
         messagebox.showerror(
@@ -1,17 +1,216 @@
 import requests
 import json
-from config import SARVAM_API_KEY
+import math
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (
+    SARVAM_API_KEYS, SCRIPT_CONFIDENCE_THRESHOLD, CHANNEL_LABELS,
+    DISPATCH_LANES, MAX_CONCURRENT_REQUESTS, MAX_REQUESTS_PER_SECOND,
+    HEDGE_CONFIDENCE_THRESHOLD, HEDGE_MAX_EXTRA_CALLS, HEDGE_MAX_EXTRA_RATIO, HEDGE_FALLBACK_LANGUAGES,
+    HEDGE_STAGGER_SECONDS, FINGERPRINT_INDEX_PATH
+)
 from simple_translation import simple_translate, get_language_name
+from language_id import (
+    classify_text, count_scripts, script_matches_language, SCRIPT_LANGUAGES
+)
+from audio_utils import split_wav_channels, streaming_wav_header, wav_channels
+from dispatcher import PriorityDispatcher
+from key_pool import KeyPool
+from fingerprint import FingerprintIndex, fingerprint_file, NUMPY_AVAILABLE
+
+# Responses worth retrying later: throttling and transient server errors
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Responses that are about the key rather than the request, so another key may succeed
+KEY_FAILURE_STATUS_CODES = (401, 403, 429)
+
+# Shared by every client in the process, since they share the same API keys
+DEFAULT_DISPATCHER = PriorityDispatcher(
+    DISPATCH_LANES,
+    max_concurrent=MAX_CONCURRENT_REQUESTS,
+    max_per_second=MAX_REQUESTS_PER_SECOND
+)
+DEFAULT_KEY_POOL = KeyPool(SARVAM_API_KEYS)
+
+
+def _format_seconds(seconds):
+    """Format seconds as MM:SS.s for timeline labels"""
+    minutes, secs = divmod(max(seconds, 0), 60)
+    return f"{int(minutes):02d}:{secs:04.1f}"
+
+
+def _keys_resting_response(retry_after):
+    """Local 429 response for when every API key is resting, so callers treat it like throttling"""
+    response = requests.Response()
+    response.status_code = 429
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    response._content = f"All API keys are resting; retry in {math.ceil(retry_after)}s".encode()
+    return response
+
+
+def _hedge_score(result):
+    """Rank hedged results: transcript in the language's own script first, then confidence"""
+    return (
+        script_matches_language(result['transcript'], result['language_detected']),
+        result.get('confidence') or 0
+    )
+
+
+def _channel_segments(result, channel, label):
+    """Build timeline segments for one channel from its timestamps, if any"""
+    timestamps = result.get('timestamps') or {}
+    words = timestamps.get('words') or []
+    starts = timestamps.get('start_time_seconds') or []
+    ends = timestamps.get('end_time_seconds') or []
+    
+    if words and len(words) == len(starts) == len(ends):
+        return [
+            {'start': start, 'end': end, 'channel': channel, 'label': label, 'text': text}
+            for text, start, end in zip(words, starts, ends)
+            if text.strip()
+        ]
+    
+    # No usable timestamps: the whole channel becomes one segment
+    transcript = result.get('original_transcript', result.get('transcript', ''))
+    if not transcript.strip():
+        return []
+    return [{'start': 0.0, 'end': 0.0, 'channel': channel, 'label': label, 'text': transcript}]
+
 
 class SarvamSTT:
-    def __init__(self):
-        self.api_key = SARVAM_API_KEY
+    def __init__(self, dispatcher=None, fingerprint_index=None, key_pool=None):
+        self.key_pool = key_pool or DEFAULT_KEY_POOL
+        self.api_key = self.key_pool.keys[0] if len(self.key_pool) else None
         self.base_url = "https://api.sarvam.ai"
         self.headers = {
             "api-subscription-key": self.api_key
         }
+        self.dispatcher = dispatcher or DEFAULT_DISPATCHER
+        self.fingerprint_index = fingerprint_index
+        if self.fingerprint_index is None and FINGERPRINT_INDEX_PATH:
+            if NUMPY_AVAILABLE:
+                self.fingerprint_index = FingerprintIndex(FINGERPRINT_INDEX_PATH)
+            else:
+                print("⚠️ NumPy not available. Fingerprint caching will be disabled.")
+        self._stats_lock = threading.Lock()
+        self.routing_stats = {
+            'translate_calls': 0,
+            'translate_skipped': 0,
+            'language_inferred': 0,
+            'pinned_requests': 0,
+            'hedge_requests': 0,
+            'hedge_extra_calls': 0,
+            'hedge_wins': 0,
+            'fingerprint_hits': 0
+        }
+    
+    def _post(self, url, priority, headers=None, track_latency=True, replayable=True, **kwargs):
+        """
+        POST through the dispatcher so all lanes share one request budget,
+        using the least-loaded healthy key from the key pool
+        
+        A response that puts its key to rest (429, 401, 403) is retried once
+        on another healthy key, if there is one. When every key is resting,
+        a local 429 is returned right away instead of holding the slot, so
+        the caller spools or retries it later. Requests whose body cannot
+        be sent twice (streaming uploads) pass replayable=False, and requests
+        whose duration is not server latency pass track_latency=False.
+        """
+        with self.dispatcher.slot(priority):
+            key = self.key_pool.acquire()
+            if not key:
+                return _keys_resting_response(self.key_pool.retry_after())
+            while True:
+                started = time.monotonic()
+                try:
+                    response = requests.post(
+                        url,
+                        headers={**(headers or {}), "api-subscription-key": key},
+                        **kwargs
+                    )
+                except Exception as e:
+                    self.key_pool.release(key, error=str(e))
+                    raise
+                self.key_pool.release(key, response.status_code,
+                                      time.monotonic() - started if track_latency else None,
+                                      getattr(response, 'headers', None))
+                
+                if not replayable or response.status_code not in KEY_FAILURE_STATUS_CODES:
+                    return response
+                next_key = self.key_pool.acquire(exclude=(key,), fallback=False)
+                if not next_key:
+                    return response
+                key, replayable = next_key, False
+                for file_tuple in (kwargs.get('files') or {}).values():
+                    file_tuple[1].seek(0)
+    
+    def get_key_usage(self):
+        """Return per-key request, throttling, latency and quota statistics"""
+        return self.key_pool.usage()
+    
+    def get_dispatch_metrics(self):
+        """Return per-lane queue-wait metrics of the request dispatcher"""
+        return self.dispatcher.get_metrics()
+    
+    def _resolve_language(self, language_code, session):
+        """Replace auto-detect with the caller session's pinned language, if any"""
+        if session is None:
+            return language_code
+        resolved = session.request_language(language_code)
+        if resolved != language_code:
+            self._count('pinned_requests')
+        return resolved
+    
+    def _transcription_result(self, result, language_code, session, with_timestamps):
+        """Build a transcription result from a successful speech-to-text response"""
+        transcript = result.get('transcript', '')
+        language_detected = result.get('language_code') or language_code
+        if language_detected == 'unknown' and transcript.strip():
+            inferred = classify_text(transcript)
+            if inferred['confidence'] >= SCRIPT_CONFIDENCE_THRESHOLD:
+                language_detected = inferred['language_code']
+                self._count('language_inferred')
+        if session is not None and language_code == 'unknown':
+            session.observe(language_detected, transcript)
+        
+        transcription = {
+            'success': True,
+            'transcript': transcript,
+            'language_detected': language_detected,
+            'confidence': result.get('confidence', 0),
+            'translated_to_english': False,
+            'full_response': result
+        }
+        if with_timestamps:
+            transcription['timestamps'] = result.get('timestamps')
+        return transcription
     
-    def transcribe_audio(self, audio_file_path, language_code="unknown", model="saarika:v2", translate_to_english=False):
+    def _fingerprint(self, audio_file_path):
+        """Fingerprint audio for the duplicate index, or return None if caching is off"""
+        if not self.fingerprint_index:
+            return None
+        try:
+            return fingerprint_file(audio_file_path)
+        except Exception as e:
+            print(f"Fingerprinting failed: {e}")
+            return None
+    
+    def _count(self, stat):
+        with self._stats_lock:
+            self.routing_stats[stat] += 1
+    
+    def get_routing_stats(self):
+        """Return counters for API work avoided by local language identification"""
+        with self._stats_lock:
+            return dict(self.routing_stats)
+    
+    def transcribe_audio(self, audio_file_path, language_code="unknown", model="saarika:v2", translate_to_english=False,
+                         with_timestamps=False, priority="interactive", session=None):
         """
         Transcribe audio file to text using Sarvam AI
         
@@ -20,6 +219,9 @@ class SarvamSTT:
             language_code (str): Language code (e.g., 'hi-IN', 'en-IN', 'unknown' for auto-detect)
             model (str): Model to use ('saarika:v2' or 'saaras')
             translate_to_english (bool): If True, uses Saaras model to directly translate to English
+            with_timestamps (bool): If True, requests segment timestamps in the response
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+            session (SessionLanguageTracker): Caller's tracker for pinning auto-detect (optional)
         
         Returns:
             dict: Transcription result
@@ -29,10 +231,22 @@ class SarvamSTT:
         
         # Use translation workflow for English output
         if translate_to_english:
-            return self.transcribe_and_translate(audio_file_path, language_code)
+            return self.transcribe_and_translate(audio_file_path, language_code, with_timestamps=with_timestamps,
+                                                 priority=priority, session=session)
         
         url = f"{self.base_url}/speech-to-text"
         
+        language_code = self._resolve_language(language_code, session)
+        
+        # Reuse the transcript of an acoustically identical clip, if indexed
+        cache_key = f"{model}|{language_code}|{int(with_timestamps)}"
+        fingerprints = self._fingerprint(audio_file_path)
+        if fingerprints:
+            match = self.fingerprint_index.lookup(fingerprints, cache_key)
+            if match:
+                self._count('fingerprint_hits')
+                return {**match['result'], 'cached': True, 'fingerprint_similarity': match['similarity']}
+        
         try:
             with open(audio_file_path, 'rb') as audio_file:
                 files = {
@@ -43,9 +257,12 @@ class SarvamSTT:
                     'model': model,
                     'language_code': language_code
                 }
+                if with_timestamps:
+                    data['with_timestamps'] = 'true'
                 
-                response = requests.post(
+                response = self._post(
                     url,
+                    priority,
                     headers=self.headers,
                     files=files,
                     data=data,
@@ -53,20 +270,17 @@ class SarvamSTT:
                 )
                 
                 if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        'success': True,
-                        'transcript': result.get('transcript', ''),
-                        'language_detected': result.get('language_code', language_code),
-                        'confidence': result.get('confidence', 0),
-                        'translated_to_english': translate_to_english,
-                        'full_response': result
-                    }
+                    transcription = self._transcription_result(response.json(), language_code, session,
+                                                               with_timestamps)
+                    if fingerprints and transcription['transcript'].strip():
+                        self.fingerprint_index.add(fingerprints[0], transcription, cache_key)
+                    return transcription
                 else:
                     return {
                         'success': False,
                         'error': f"API Error: {response.status_code} - {response.text}",
-                        'transcript': ''
+                        'transcript': '',
+                        'retryable': response.status_code in RETRYABLE_STATUS_CODES
                     }
                     
         except FileNotFoundError:
@@ -79,8 +293,91 @@ class SarvamSTT:
             return {
                 'success': False,
                 'error': f"Network error: {str(e)}",
+                'transcript': '',
+                'retryable': True
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Unexpected error: {str(e)}",
                 'transcript': ''
             }
+    
+    def transcribe_stream(self, chunks, channels, sample_width, rate, language_code="unknown",
+                          model="saarika:v2", translate_to_english=False, priority="interactive", session=None):
+        """
+        Transcribe audio while it is still being produced
+        
+        The request body is a chunked multipart upload fed from `chunks`, so
+        audio is sent as it is recorded and only the tail remains to upload
+        once the iterator ends.
+        
+        Args:
+            chunks (iterable): Raw PCM chunks; iteration ends when recording stops
+            channels (int): Number of channels in the PCM data
+            sample_width (int): Bytes per sample
+            rate (int): Sample rate in Hz
+            language_code (str): Language code or 'unknown' for auto-detect
+            model (str): Model to use
+            translate_to_english (bool): If True, translates the transcript to English
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+            session (SessionLanguageTracker): Caller's tracker for pinning auto-detect (optional)
+        
+        Returns:
+            dict: Transcription result
+        """
+        if not self.api_key:
+            raise ValueError("Sarvam API key not found. Please set SARVAM_API_KEY in your .env file")
+        
+        url = f"{self.base_url}/speech-to-text"
+        language_code = self._resolve_language(language_code, session)
+        boundary = uuid.uuid4().hex
+        
+        def body():
+            for name, value in (('model', model), ('language_code', language_code)):
+                yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                       f'{value}\r\n').encode()
+            yield (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="recording.wav"\r\n'
+                   f'Content-Type: audio/wav\r\n\r\n').encode()
+            yield streaming_wav_header(channels, sample_width, rate)
+            for chunk in chunks:
+                yield chunk
+            yield f'\r\n--{boundary}--\r\n'.encode()
+        
+        try:
+            response = self._post(
+                url,
+                priority,
+                headers={
+                    **self.headers,
+                    "Content-Type": f"multipart/form-data; boundary={boundary}"
+                },
+                track_latency=False,
+                replayable=False,
+                data=body(),
+                timeout=30
+            )
+            
+            if response.status_code != 200:
+                return {
+                    'success': False,
+                    'error': f"API Error: {response.status_code} - {response.text}",
+                    'transcript': '',
+                    'retryable': response.status_code in RETRYABLE_STATUS_CODES
+                }
+            
+            transcription = self._transcription_result(response.json(), language_code, session, False)
+            if translate_to_english:
+                return self.translate_result(transcription, priority=priority)
+            return transcription
+            
+        except requests.exceptions.RequestException as e:
+            return {
+                'success': False,
+                'error': f"Network error: {str(e)}",
+                'transcript': '',
+                'retryable': True
+            }
         except Exception as e:
             return {
                 'success': False,
@@ -88,7 +385,8 @@ class SarvamSTT:
                 'transcript': ''
             }
     
-    def transcribe_with_diarization(self, audio_file_path, language_code="unknown", num_speakers=2):
+    def transcribe_with_diarization(self, audio_file_path, language_code="unknown", num_speakers=2,
+                                    priority="interactive"):
         """
         Transcribe audio with speaker diarization
         
@@ -96,6 +394,7 @@ class SarvamSTT:
             audio_file_path (str): Path to the audio file
             language_code (str): Language code
             num_speakers (int): Number of speakers
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
         
         Returns:
             dict: Transcription result with speaker information
@@ -118,8 +417,9 @@ class SarvamSTT:
                     'num_speakers': str(num_speakers)
                 }
                 
-                response = requests.post(
+                response = self._post(
                     url,
+                    priority,
                     headers=self.headers,
                     files=files,
                     data=data,
@@ -149,36 +449,252 @@ class SarvamSTT:
                 'transcript': ''
             }
     
-    def transcribe_and_translate(self, audio_file_path, source_language="unknown"):
+    def transcribe_and_translate(self, audio_file_path, source_language="unknown", with_timestamps=False,
+                                 priority="interactive", session=None):
         """
         Transcribe audio and translate to English using two-step process
         
         Args:
             audio_file_path (str): Path to the audio file
             source_language (str): Source language code (optional, auto-detected if unknown)
+            with_timestamps (bool): If True, keeps the original-language segment timestamps
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+            session (SessionLanguageTracker): Caller's tracker for pinning auto-detect (optional)
         
         Returns:
             dict: Translation result with English text
         """
         # First, transcribe the audio normally
-        transcribe_result = self.transcribe_audio(audio_file_path, source_language, model="saarika:v2", translate_to_english=False)
+        transcribe_result = self.transcribe_audio(audio_file_path, source_language, model="saarika:v2",
+                                                  translate_to_english=False, with_timestamps=with_timestamps,
+                                                  priority=priority, session=session)
         
         if not transcribe_result['success']:
             return transcribe_result
         
+        return self.translate_result(transcribe_result, with_timestamps=with_timestamps, priority=priority)
+    
+    def translate_result(self, transcribe_result, with_timestamps=False, priority="interactive"):
+        """Translate a successful transcription result to English, skipping English text"""
         transcript = transcribe_result['transcript']
         detected_language = transcribe_result['language_detected']
         
-        # If already in English, return as is
-        if detected_language == 'en-IN' or not transcript.strip():
+        # If already in English (by API or by script), return as is
+        classification = classify_text(transcript)
+        latin_script = (classification['script'] == 'Latin'
+                        and classification['confidence'] >= SCRIPT_CONFIDENCE_THRESHOLD)
+        if detected_language == 'en-IN' or latin_script or not transcript.strip():
+            if detected_language != 'en-IN' and transcript.strip():
+                self._count('translate_skipped')
             transcribe_result['translated_to_english'] = True
             transcribe_result['source_language'] = detected_language
             return transcribe_result
         
         # Translate to English using Sarvam's translate API
-        return self.translate_text_to_english(transcript, detected_language, transcribe_result)
+        self._count('translate_calls')
+        translated = self.translate_text_to_english(transcript, detected_language, transcribe_result,
+                                                    priority=priority)
+        if with_timestamps:
+            translated['timestamps'] = transcribe_result.get('timestamps')
+        return translated
+    
+    def transcribe_with_hedging(self, audio_file_path, translate_to_english=False,
+                                confidence_threshold=HEDGE_CONFIDENCE_THRESHOLD,
+                                max_extra_calls=HEDGE_MAX_EXTRA_CALLS, priority="interactive"):
+        """
+        Auto-detect the language, hedging with candidate languages when unsure
+        
+        If the auto-detected result has low confidence, or the local script
+        classifier disagrees with it, the top candidate languages are
+        transcribed and the best-scoring result wins. Candidates start one
+        after another, HEDGE_STAGGER_SECONDS apart, and overlap once started;
+        candidates not yet started are skipped as soon as one clears the
+        threshold. Only calls actually sent count against the caps, per
+        request and, via HEDGE_MAX_EXTRA_RATIO, per session.
+        
+        Args:
+            audio_file_path (str): Path to the audio file
+            translate_to_english (bool): If True, translates the winning transcript to English
+            confidence_threshold (float): Confidence below which candidates are tried
+            max_extra_calls (int): Maximum candidate transcriptions for this request
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+        
+        Returns:
+            dict: Transcription result, with 'hedged_languages' listing the candidates sent
+        """
+        first = self.transcribe_audio(audio_file_path, "unknown", priority=priority)
+        self._count('hedge_requests')
+        if not first['success']:
+            return first
+        
+        best = first
+        candidates = self._hedge_candidates(first, confidence_threshold)
+        with self._stats_lock:
+            # Long-run budget of HEDGE_MAX_EXTRA_RATIO extra calls per request, plus one burst
+            allowed = int(self.routing_stats['hedge_requests'] * HEDGE_MAX_EXTRA_RATIO + max_extra_calls
+                          - self.routing_stats['hedge_extra_calls'])
+            candidates = candidates[:max(0, min(max_extra_calls, allowed))]
+            # Reserved now so concurrent requests share the budget; unsent calls are refunded
+            self.routing_stats['hedge_extra_calls'] += len(candidates)
+        
+        sent = []
+        if candidates:
+            done = threading.Event()
+            
+            def run_candidate(index, language):
+                if done.wait(HEDGE_STAGGER_SECONDS * index):
+                    return None
+                with self._stats_lock:
+                    sent.append(language)
+                return self.transcribe_audio(audio_file_path, language, priority=priority)
+            
+            executor = ThreadPoolExecutor(max_workers=len(candidates))
+            futures = [
+                executor.submit(run_candidate, index, language)
+                for index, language in enumerate(candidates)
+            ]
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    if not result or not result['success']:
+                        continue
+                    if _hedge_score(result) > _hedge_score(best):
+                        best = result
+                    if _hedge_score(result)[0] and result.get('confidence', 0) >= confidence_threshold:
+                        break
+            finally:
+                # Candidates still waiting to start are skipped; requests already sent
+                # cannot be aborted and their results are discarded
+                done.set()
+                executor.shutdown(wait=False)
+            with self._stats_lock:
+                self.routing_stats['hedge_extra_calls'] -= len(candidates) - len(sent)
+            if best is not first:
+                self._count('hedge_wins')
+        
+        best['hedged_languages'] = list(sent)
+        if translate_to_english:
+            return self.translate_result(best, priority=priority)
+        return best
+    
+    def _hedge_candidates(self, result, confidence_threshold):
+        """Return candidate languages to try, or an empty list if the result looks reliable"""
+        transcript = result['transcript']
+        detected = result['language_detected']
+        if not transcript.strip():
+            # Silence: another language will not find speech either
+            return []
+        classification = classify_text(transcript)
+        
+        script_agrees = (classification['confidence'] >= SCRIPT_CONFIDENCE_THRESHOLD
+                         and detected in classification['candidates'])
+        confidence = result.get('confidence') or 0
+        if script_agrees and (confidence >= confidence_threshold or not confidence):
+            return []
+        
+        # Languages of the scripts found in the transcript, most common script first
+        ranked = []
+        counts = count_scripts(transcript)
+        for script in sorted(counts, key=counts.get, reverse=True):
+            ranked.extend(SCRIPT_LANGUAGES[script])
+        ranked.extend(HEDGE_FALLBACK_LANGUAGES)
+        
+        candidates = []
+        for language in ranked:
+            if language != detected and language not in candidates:
+                candidates.append(language)
+        return candidates
+    
+    def transcribe_multichannel(self, audio_file_path, language_code="unknown", translate_to_english=False,
+                                channel_labels=None, max_workers=None, priority="interactive", session=None):
+        """
+        Transcribe each channel of a multi-channel WAV file in parallel
+        
+        Channels are split into temporary mono files, transcribed concurrently
+        with timestamps, and merged into a single timeline labeled by channel.
+        Timeline segments are in the spoken language; when translating, the
+        English text of each channel is returned in 'channels'.
+        
+        Args:
+            audio_file_path (str): Path to a WAV file
+            language_code (str): Language code applied to every channel
+            translate_to_english (bool): If True, also translates each channel to English
+            channel_labels (list): Display names per channel (defaults to config.CHANNEL_LABELS)
+            max_workers (int): Maximum concurrent channel requests (defaults to one per channel)
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+            session (SessionLanguageTracker): Caller's tracker for pinning auto-detect; used for
+                mono audio only, since each channel is a different speaker
+        
+        Returns:
+            dict: Merged result with 'segments' and per-channel results in 'channels'
+        """
+        if wav_channels(audio_file_path) <= 1:
+            return self.transcribe_audio(audio_file_path, language_code, translate_to_english=translate_to_english,
+                                         priority=priority, session=session)
+        
+        temp_dir = tempfile.mkdtemp(prefix="sarvam_channels_")
+        try:
+            try:
+                channel_paths = split_wav_channels(audio_file_path, temp_dir)
+            except (wave.Error, EOFError) as e:
+                return {
+                    'success': False,
+                    'error': f"Could not split audio channels: {str(e)}",
+                    'transcript': ''
+                }
+            
+            labels = list(channel_labels or CHANNEL_LABELS)
+            labels += [f"Channel {i + 1}" for i in range(len(labels), len(channel_paths))]
+            
+            with ThreadPoolExecutor(max_workers=max_workers or len(channel_paths)) as executor:
+                results = list(executor.map(
+                    lambda path: self.transcribe_audio(path, language_code,
+                                                       translate_to_english=translate_to_english,
+                                                       with_timestamps=True,
+                                                       priority=priority),
+                    channel_paths
+                ))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        failed = [(label, r) for label, r in zip(labels, results) if not r['success']]
+        if len(failed) == len(results):
+            return {
+                'success': False,
+                'error': "; ".join(f"{label}: {r.get('error', 'Unknown error')}" for label, r in failed),
+                'transcript': '',
+                'retryable': any(r.get('retryable') for r in results)
+            }
+        
+        segments = []
+        channels = []
+        for index, (label, result) in enumerate(zip(labels, results)):
+            channels.append({'channel': index + 1, 'label': label, **result})
+            if result['success']:
+                segments.extend(_channel_segments(result, index + 1, label))
+        segments.sort(key=lambda seg: (seg['start'], seg['channel']))
+        
+        if translate_to_english:
+            # Segment timestamps refer to the spoken text, so English output is per channel
+            transcript = "\n".join(f"{ch['label']}: {ch['transcript']}"
+                                   for ch in channels if ch['success'] and ch['transcript'].strip())
+        else:
+            transcript = "\n".join(f"[{_format_seconds(seg['start'])}] {seg['label']}: {seg['text']}"
+                                   for seg in segments)
+        
+        first_ok = next(r for r in results if r['success'])
+        return {
+            'success': True,
+            'transcript': transcript,
+            'segments': segments,
+            'channels': channels,
+            'language_detected': first_ok.get('language_detected', language_code),
+            'source_language': first_ok.get('source_language', first_ok.get('language_detected', language_code)),
+            'confidence': min(r.get('confidence', 0) for r in results if r['success']),
+            'translated_to_english': translate_to_english
+        }
     
-    def translate_text_to_english(self, text, source_language, original_result):
+    def translate_text_to_english(self, text, source_language, original_result, priority="interactive"):
         """
         Translate text to English using Sarvam AI translation API
         
@@ -186,6 +702,7 @@ class SarvamSTT:
             text (str): Text to translate
             source_language (str): Source language code
             original_result (dict): Original transcription result
+            priority (str): Dispatch lane ('interactive', 'live' or 'batch')
         
         Returns:
             dict: Translation result
@@ -202,7 +719,7 @@ class SarvamSTT:
         
         for method in translation_methods:
             try:
-                result = method(text, source_language, original_result)
+                result = method(text, source_language, original_result, priority)
                 if result and result.get('success') and 'Translation failed' not in result.get('transcript', ''):
                     return result
             except Exception as e:
@@ -222,7 +739,7 @@ class SarvamSTT:
             'translation_method': 'Simple dictionary lookup'
         }
     
-    def _try_translate_api(self, text, source_language, original_result):
+    def _try_translate_api(self, text, source_language, original_result, priority="interactive"):
         """Try the main translate API"""
         url = f"{self.base_url}/translate"
         
@@ -235,8 +752,9 @@ class SarvamSTT:
             "model": "mayura:v1"
         }
         
-        response = requests.post(
+        response = self._post(
             url,
+            priority,
             headers={
                 **self.headers,
                 "Content-Type": "application/json"
@@ -260,7 +778,7 @@ class SarvamSTT:
             }
         return None
     
-    def _try_basic_translation(self, text, source_language, original_result):
+    def _try_basic_translation(self, text, source_language, original_result, priority="interactive"):
         """Try basic translation with minimal parameters"""
         url = f"{self.base_url}/translate"
         
@@ -270,8 +788,9 @@ class SarvamSTT:
             "target_language_code": "en-IN"
         }
         
-        response = requests.post(
+        response = self._post(
             url,
+            priority,
             headers={
                 **self.headers,
                 "Content-Type": "application/json"
@@ -295,7 +814,7 @@ class SarvamSTT:
             }
         return None
     
-    def _try_simple_translation(self, text, source_language, original_result):
+    def _try_simple_translation(self, text, source_language, original_result, priority="interactive"):
         """Try simplest translation approach"""
         # Basic language mapping for common phrases
         simple_translations = {
@@ -0,0 +1,261 @@
+"""
+Durable on-disk spool for recordings that could not be transcribed
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config import SPOOL_DIR, SPOOL_MAX_WORKERS, SPOOL_RETRY_INITIAL, SPOOL_RETRY_MAX
+
+
+class RecordingSpool:
+    """
+    SQLite-backed FIFO of audio files waiting for the API
+
+    Audio is copied into the spool directory before its row is committed, so
+    a spooled recording survives the caller deleting its temp file and the
+    process exiting. Items are marked delivered before their result is
+    handed out, so each one is delivered at most once. A result that
+    arrives before an earlier item's is held in the spool until the
+    earlier one is delivered.
+    """
+
+    def __init__(self, spool_dir=SPOOL_DIR):
+        self.spool_dir = spool_dir
+        self.audio_dir = os.path.join(spool_dir, "audio")
+        self.db_path = os.path.join(spool_dir, "spool.db")
+        os.makedirs(self.audio_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    audio_path TEXT NOT NULL,
+                    original_name TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(items)")]
+            if 'result' not in columns:
+                conn.execute("ALTER TABLE items ADD COLUMN result TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS items_status ON items (status, id)")
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection whose block runs as one transaction"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, audio_file_path, **options):
+        """
+        Copy an audio file into the spool
+
+        Args:
+            audio_file_path (str): Audio file to spool
+            **options: Transcription options replayed later (language_code, translate_to_english)
+
+        Returns:
+            int: Spool item id
+        """
+        name = os.path.basename(audio_file_path)
+        spooled_path = os.path.join(self.audio_dir, f"{uuid.uuid4().hex}_{name}")
+        shutil.copyfile(audio_file_path, spooled_path)
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO items (audio_path, original_name, options, created_at) VALUES (?, ?, ?, ?)",
+                (spooled_path, name, json.dumps(options), time.time())
+            )
+            return cursor.lastrowid
+
+    def pending(self, limit):
+        """Return up to `limit` items still to be transcribed, in arrival order"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, audio_path, original_name, options, attempts FROM items "
+                "WHERE status = 'pending' ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {
+                'id': row[0],
+                'audio_path': row[1],
+                'original_name': row[2],
+                'options': json.loads(row[3]),
+                'attempts': row[4]
+            }
+            for row in rows
+        ]
+
+    def pending_count(self):
+        """Return the number of items waiting to be delivered"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM items WHERE status IN ('pending', 'held')").fetchone()[0]
+
+    def hold(self, item_id, result):
+        """Store a finished result until every earlier item has been delivered"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = 'held', result = ?, attempts = attempts + 1 "
+                "WHERE id = ? AND status = 'pending'",
+                (json.dumps(result, ensure_ascii=False), item_id)
+            )
+
+    def deliverable(self):
+        """
+        Return held items that no pending item precedes, in arrival order
+
+        Returns:
+            list: Items with their stored 'result'
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, audio_path, original_name, options, attempts, result FROM items "
+                "WHERE status = 'held' AND id < COALESCE((SELECT MIN(id) FROM items WHERE status = 'pending'), "
+                "9223372036854775807) ORDER BY id"
+            ).fetchall()
+        return [
+            {
+                'id': row[0],
+                'audio_path': row[1],
+                'original_name': row[2],
+                'options': json.loads(row[3]),
+                'attempts': row[4],
+                'result': json.loads(row[5])
+            }
+            for row in rows
+        ]
+
+    def mark_done(self, item_id, status="delivered", error=None):
+        """
+        Take an item out of the spool for good
+
+        Returns:
+            bool: True if this call claimed the item, False if it was already done
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET status = ?, last_error = ?, result = NULL, "
+                "attempts = attempts + (status = 'pending') "
+                "WHERE id = ? AND status IN ('pending', 'held')",
+                (status, error, item_id)
+            )
+            claimed = cursor.rowcount == 1
+            row = conn.execute("SELECT audio_path FROM items WHERE id = ?", (item_id,)).fetchone()
+
+        if claimed and row and os.path.exists(row[0]):
+            os.remove(row[0])
+        return claimed
+
+    def record_attempt(self, item_id, error):
+        """Record a failed attempt and leave the item pending"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (error, item_id)
+            )
+
+
+class SpoolDrainer:
+    """
+    Background thread that replays spooled recordings once the API is healthy
+
+    Items are transcribed with bounded concurrency and delivered in arrival
+    order: results that finish behind a retryable failure are held and
+    delivered once the earlier item succeeds, instead of being sent again.
+    While the API keeps failing, only the oldest item is tried, as a probe,
+    with exponential backoff between attempts.
+    """
+
+    def __init__(self, spool, stt, on_result, max_workers=SPOOL_MAX_WORKERS, priority="batch"):
+        """
+        Args:
+            spool (RecordingSpool): Spool to drain
+            stt (SarvamSTT): Client used for transcription
+            on_result (callable): Called with (item, result) for each delivered item
+            max_workers (int): Maximum concurrent replays once the API is healthy
+            priority (str): Dispatch lane for replayed requests
+        """
+        self.spool = spool
+        self.stt = stt
+        self.on_result = on_result
+        self.max_workers = max_workers
+        self.priority = priority
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start draining in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the drainer after the current batch"""
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        """Wake the drainer after something was enqueued, cutting a backoff wait short"""
+        self._wake.set()
+
+    def _transcribe(self, item):
+        return self.stt.transcribe_multichannel(item['audio_path'], priority=self.priority, **item['options'])
+
+    def _deliver_held(self):
+        for item in self.spool.deliverable():
+            result = item.pop('result')
+            status = "delivered" if result['success'] else "failed"
+            if self.spool.mark_done(item['id'], status, result.get('error')):
+                self.on_result(item, result)
+
+    def _run(self):
+        delay = SPOOL_RETRY_INITIAL
+        healthy = True
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stop.is_set():
+                self._deliver_held()
+                items = self.spool.pending(self.max_workers if healthy else 1)
+                if not items:
+                    self._wake.wait()
+                    self._wake.clear()
+                    continue
+
+                results = list(executor.map(self._transcribe, items))
+                healthy = True
+                for item, result in zip(items, results):
+                    if not result['success'] and result.get('retryable'):
+                        self.spool.record_attempt(item['id'], result.get('error'))
+                        healthy = False
+                    else:
+                        # Delivered in arrival order by _deliver_held
+                        self.spool.hold(item['id'], result)
+                self._deliver_held()
+
+                if healthy:
+                    delay = SPOOL_RETRY_INITIAL
+                else:
+                    # A new recording (notify) probes early, so it is not stuck behind the backoff;
+                    # stop() sets the same event and is checked by the loop
+                    self._wake.wait(delay)
+                    self._wake.clear()
+                    delay = min(delay * 2, SPOOL_RETRY_MAX)
@@ -0,0 +1,203 @@
+"""
+Streaming SRT/WebVTT subtitle export
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_utils import iter_wav_windows, write_wav
+from config import SUBTITLE_WINDOW_SECONDS, SUBTITLE_MAX_IN_FLIGHT
+
+
+def format_timestamp(seconds, fmt="srt"):
+    """Format seconds as an SRT (HH:MM:SS,mmm) or WebVTT (HH:MM:SS.mmm) timestamp"""
+    millis = int(round(max(seconds, 0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    separator = "," if fmt == "srt" else "."
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+class SubtitleWriter:
+    """Writes subtitle cues to disk as they arrive, flushing after each one"""
+
+    def __init__(self, path, fmt=None):
+        """
+        Args:
+            path (str): Output file path
+            fmt (str): 'srt' or 'vtt' (inferred from the file extension if omitted)
+        """
+        self.path = path
+        self.fmt = fmt or ("vtt" if path.lower().endswith(".vtt") else "srt")
+        self.cue_count = 0
+        self._file = open(path, "w", encoding="utf-8")
+        if self.fmt == "vtt":
+            self._file.write("WEBVTT\n\n")
+            self._file.flush()
+
+    def write_cue(self, start, end, text):
+        """Append one cue and flush it so partial files are usable"""
+        text = text.strip()
+        if not text:
+            return
+        self.cue_count += 1
+        if self.fmt == "srt":
+            self._file.write(f"{self.cue_count}\n")
+        self._file.write(
+            f"{format_timestamp(start, self.fmt)} --> {format_timestamp(end, self.fmt)}\n{text}\n\n"
+        )
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _window_cues(result, start, end, translated):
+    """
+    Split a window result into original-text segments and the English text
+
+    When the API returned segment timestamps the original text gets one cue
+    per segment; the English text always covers the whole window.
+    """
+    if translated:
+        original = result.get('original_transcript', result.get('transcript', ''))
+        english = result.get('transcript', '')
+    else:
+        original = result.get('transcript', '')
+        english = ''
+
+    timestamps = result.get('timestamps') or {}
+    words = timestamps.get('words') or []
+    starts = timestamps.get('start_time_seconds') or []
+    ends = timestamps.get('end_time_seconds') or []
+    if words and len(words) == len(starts) == len(ends):
+        segments = [(start + s, min(start + e, end), w) for w, s, e in zip(words, starts, ends)]
+    else:
+        segments = [(start, end, original)]
+    return segments, english
+
+
+def transcribe_to_subtitles(stt, audio_file_path, original_path=None, english_path=None,
+                            language_code="unknown", window_seconds=SUBTITLE_WINDOW_SECONDS,
+                            max_in_flight=SUBTITLE_MAX_IN_FLIGHT, priority="batch", on_cue=None):
+    """
+    Transcribe a WAV file window by window, writing subtitle cues as each window completes
+
+    Windows are transcribed concurrently (at most `max_in_flight` at a time)
+    but written strictly in order, so the subtitle files are always a valid
+    prefix of the final output and memory stays bounded.
+
+    Args:
+        stt (SarvamSTT): Client used for transcription
+        audio_file_path (str): Path to a WAV file
+        original_path (str): Subtitle file for the spoken-language text (.srt or .vtt)
+        english_path (str): Subtitle file for the English translation (.srt or .vtt)
+        language_code (str): Language code or 'unknown' for auto-detect
+        window_seconds (float): Length of each transcription window
+        max_in_flight (int): Maximum windows being transcribed at once
+        priority (str): Dispatch lane ('interactive', 'live' or 'batch')
+        on_cue (callable): Called with (start, end, original, english) for each window
+
+    Returns:
+        dict: Summary with 'success', 'windows', 'failed_windows' and 'cues'
+    """
+    if not original_path and not english_path:
+        raise ValueError("At least one of original_path or english_path is required")
+
+    translate = bool(english_path)
+    writers = {}
+    if original_path:
+        writers['original'] = SubtitleWriter(original_path)
+    if english_path:
+        writers['english'] = SubtitleWriter(english_path)
+
+    temp_dir = tempfile.mkdtemp(prefix="sarvam_subtitles_")
+    summary = {'success': True, 'windows': 0, 'failed_windows': 0, 'cues': 0, 'errors': []}
+
+    def transcribe_window(index, frames, channels, sample_width, rate):
+        path = write_wav(os.path.join(temp_dir, f"window_{index}.wav"), frames, channels, sample_width, rate)
+        try:
+            return stt.transcribe_audio(path, language_code, translate_to_english=translate,
+                                        with_timestamps=True, priority=priority)
+        finally:
+            os.remove(path)
+
+    def emit(start, end, future):
+        summary['windows'] += 1
+        result = future.result()
+        if not result['success']:
+            summary['failed_windows'] += 1
+            summary['errors'].append(f"{format_timestamp(start)}: {result.get('error', 'Unknown error')}")
+            return
+        segments, english = _window_cues(result, start, end, translate)
+        if 'original' in writers:
+            for seg_start, seg_end, text in segments:
+                writers['original'].write_cue(seg_start, seg_end, text)
+        if 'english' in writers:
+            writers['english'].write_cue(start, end, english)
+        if on_cue:
+            on_cue(start, end, " ".join(text for _, _, text in segments).strip(), english)
+
+    try:
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            windows = iter_wav_windows(audio_file_path, window_seconds)
+            for index, (start, end, frames, channels, sample_width, rate) in enumerate(windows):
+                pending.append((start, end, executor.submit(
+                    transcribe_window, index, frames, channels, sample_width, rate)))
+                if len(pending) >= max_in_flight:
+                    emit(*pending.popleft())
+            while pending:
+                emit(*pending.popleft())
+    finally:
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    summary['cues'] = sum(writer.cue_count for writer in writers.values())
+    summary['success'] = summary['windows'] > summary['failed_windows']
+    return summary
+
+
+def main():
+    """Command line entry point: python subtitles.py input.wav --original out.srt --english out.en.vtt"""
+    from sarvam_client import SarvamSTT
+
+    parser = argparse.ArgumentParser(description="Export SRT/WebVTT subtitles with Sarvam AI")
+    parser.add_argument("audio_file", help="WAV file to transcribe")
+    parser.add_argument("--original", help="Subtitle file for the spoken language (.srt or .vtt)")
+    parser.add_argument("--english", help="Subtitle file for the English translation (.srt or .vtt)")
+    parser.add_argument("--language", default="unknown", help="Language code, e.g. hi-IN (default: auto-detect)")
+    parser.add_argument("--window", type=float, default=SUBTITLE_WINDOW_SECONDS, help="Window length in seconds")
+    args = parser.parse_args()
+
+    if not args.original and not args.english:
+        parser.error("give --original and/or --english")
+
+    summary = transcribe_to_subtitles(
+        SarvamSTT(),
+        args.audio_file,
+        original_path=args.original,
+        english_path=args.english,
+        language_code=args.language,
+        window_seconds=args.window,
+        on_cue=lambda start, end, original, english: print(
+            f"[{format_timestamp(start)}] {english or original}")
+    )
+    print(f"✅ {summary['cues']} cues from {summary['windows']} windows "
+          f"({summary['failed_windows']} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Duplicate matching of the fingerprint index: python -m pytest test_fingerprint.py
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio_utils import write_wav
+from fingerprint import FingerprintIndex, fingerprint_file
+
+RATE = 16000
+
+
+def synthetic_speech(seed, seconds):
+    """Harmonic glides with syllable-like envelopes, distinct per seed"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    signal = np.zeros_like(t)
+    for _ in range(int(6 * seconds)):
+        f0 = rng.uniform(100, 250)
+        start = rng.uniform(0, seconds - 0.4)
+        length = rng.uniform(0.1, 0.4)
+        span = slice(int(start * RATE), int((start + length) * RATE))
+        envelope = np.sin(np.pi * (t[span] - start) / length) ** 2
+        frequency = f0 * (1 + 0.3 * (t[span] - start))
+        for harmonic in range(1, 12):
+            amplitude = rng.uniform(0.1, 1) / harmonic
+            signal[span] += amplitude * envelope * np.sin(2 * np.pi * harmonic * frequency * t[span])
+    return signal / np.abs(signal).max() * 0.8
+
+
+def save(path, samples):
+    write_wav(str(path), (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes(), 1, 2, RATE)
+    return str(path)
+
+
+@pytest.fixture
+def recording():
+    return synthetic_speech(11, 60)
+
+
+def test_padded_copy_matches(tmp_path, recording):
+    index = FingerprintIndex(str(tmp_path / "index.db"))
+    index.add(fingerprint_file(save(tmp_path / "original.wav", recording))[0], {'transcript': "original"})
+
+    padded = np.concatenate([np.zeros(5000), recording])
+    match = index.lookup(fingerprint_file(save(tmp_path / "padded.wav", padded)))
+    assert match and match['result']['transcript'] == "original"
+
+
+def test_excerpt_does_not_match_full_recording(tmp_path, recording):
+    index = FingerprintIndex(str(tmp_path / "index.db"))
+    index.add(fingerprint_file(save(tmp_path / "full.wav", recording))[0], {'transcript': "full"})
+
+    excerpt = recording[20 * RATE:23 * RATE]
+    assert index.lookup(fingerprint_file(save(tmp_path / "excerpt.wav", excerpt))) is None
+
+
+def test_full_recording_does_not_match_excerpt(tmp_path, recording):
+    index = FingerprintIndex(str(tmp_path / "index.db"))
+    excerpt = recording[20 * RATE:23 * RATE]
+    index.add(fingerprint_file(save(tmp_path / "excerpt.wav", excerpt))[0], {'transcript': "excerpt"})
+
+    assert index.lookup(fingerprint_file(save(tmp_path / "full.wav", recording))) is None
+
+
+def test_unrelated_clip_does_not_match(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "index.db"))
+    index.add(fingerprint_file(save(tmp_path / "a.wav", synthetic_speech(1, 4)))[0], {'transcript': "a"})
+
+    assert index.lookup(fingerprint_file(save(tmp_path / "b.wav", synthetic_speech(2, 4)))) is None
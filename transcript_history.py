@@ -0,0 +1,290 @@
+"""
+Persistent transcript history with full-text search across Indic scripts
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+from config import HISTORY_DB_PATH
+
+ZERO_WIDTH_JOINERS = ('\u200c', '\u200d')
+
+# Viramas that join the next consonant into a conjunct (Unicode InCB=Linker).
+# Tamil, Gurmukhi and Kannada viramas end the cluster instead.
+LINKING_VIRAMAS = ('\u094d', '\u09cd', '\u0acd', '\u0b4d', '\u0c4d', '\u0d4d')
+
+
+def normalize(text):
+    """NFC-normalize and case-fold text so equivalent spellings compare equal"""
+    return unicodedata.normalize('NFC', text).casefold()
+
+
+def graphemes(word):
+    """
+    Split a word into grapheme clusters
+
+    Combining marks (vowel signs, nasalisation, nukta) stay with their base
+    letter, and a consonant following a linking virama or zero-width joiner
+    stays in the same conjunct, so 'क्षमा' splits as ['क्ष', 'मा'].
+    """
+    clusters = []
+    for ch in word:
+        joins = clusters and (
+            unicodedata.category(ch).startswith('M')
+            or ch in ZERO_WIDTH_JOINERS
+            or clusters[-1][-1] in LINKING_VIRAMAS
+            or clusters[-1][-1] in ZERO_WIDTH_JOINERS
+        )
+        if joins:
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+    return clusters
+
+
+def words(text):
+    """Split normalized text into words of letters, digits and combining marks"""
+    result = []
+    current = []
+    for ch in text:
+        if ch.isalnum() or unicodedata.category(ch).startswith('M') or ch in ZERO_WIDTH_JOINERS:
+            current.append(ch)
+        elif current:
+            result.append(''.join(current))
+            current = []
+    if current:
+        result.append(''.join(current))
+    return result
+
+
+def phrase_text(text):
+    """Reduce text to its normalized words joined by single spaces, for phrase matching"""
+    return ' '.join(words(normalize(text)))
+
+
+def tokenize(text):
+    """
+    Turn text into index terms: grapheme bigrams of every word
+
+    Single-grapheme words are indexed as unigrams. Because terms are
+    sub-word n-grams, any query of two or more graphemes finds matches
+    inside longer words too, whatever the script.
+
+    Returns:
+        set: Index terms
+    """
+    terms = set()
+    for word in words(normalize(text)):
+        clusters = graphemes(word)
+        if len(clusters) == 1:
+            terms.add(clusters[0])
+        for i in range(len(clusters) - 1):
+            terms.add(clusters[i] + clusters[i + 1])
+    return terms
+
+
+class TranscriptHistory:
+    """
+    SQLite-backed store of transcription results with an inverted index
+
+    Postings are clustered by term, and document frequencies are kept per
+    term, so a search starts from its rarest term and checks the other
+    terms with index seeks instead of scanning large posting lists.
+    """
+
+    def __init__(self, db_path=HISTORY_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    language TEXT,
+                    confidence REAL,
+                    original TEXT NOT NULL,
+                    english TEXT NOT NULL,
+                    search_text TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS terms (
+                    term TEXT PRIMARY KEY,
+                    df INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            # Histories written before search_text held phrase_text()
+            if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+                rows = conn.execute("SELECT id, original, english FROM transcripts").fetchall()
+                conn.executemany(
+                    "UPDATE transcripts SET search_text = ? WHERE id = ?",
+                    [(f"{phrase_text(original)}\n{phrase_text(english)}", doc_id) for doc_id, original, english in rows]
+                )
+                conn.execute("PRAGMA user_version = 1")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, original, english="", language=None, confidence=None, created_at=None):
+        """
+        Store one transcript and index it
+
+        Returns:
+            int: Transcript id
+        """
+        # One line per text, so a phrase never matches across the two
+        search_text = f"{phrase_text(original)}\n{phrase_text(english)}"
+        terms = tokenize(search_text)
+        with self._lock, self._connect() as conn:
+            doc_id = conn.execute(
+                "INSERT INTO transcripts (created_at, language, confidence, original, english, search_text) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (created_at or time.time(), language, confidence, original, english, search_text)
+            ).lastrowid
+            conn.executemany("INSERT INTO postings (term, doc_id) VALUES (?, ?)",
+                             [(term, doc_id) for term in terms])
+            conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                [(term,) for term in terms]
+            )
+        return doc_id
+
+    def add_result(self, result):
+        """
+        Store a SarvamSTT result
+
+        Returns:
+            int: Transcript id, or None if the result has no transcript
+        """
+        if not result.get('success') or not result.get('transcript', '').strip():
+            return None
+        language = result.get('source_language', result.get('language_detected'))
+        if result.get('translated_to_english'):
+            english = result['transcript']
+            if result.get('channels'):
+                # Multi-channel results keep each channel's original text in its own result
+                original = "\n".join(
+                    f"{channel['label']}: {channel.get('original_transcript', channel['transcript'])}"
+                    for channel in result['channels']
+                    if channel.get('success') and channel.get('transcript', '').strip()
+                )
+            else:
+                original = result.get('original_transcript', english)
+        else:
+            original = result['transcript']
+            english = original if language == 'en-IN' else ''
+        return self.add(original, english, language, result.get('confidence'))
+
+    def search(self, query, limit=20):
+        """
+        Find transcripts containing `query` in the original or English text, newest first
+
+        Returns:
+            list: Dicts with id, created_at, language, confidence, original and english
+        """
+        needle = phrase_text(query)
+        terms = tokenize(needle)
+        if not terms:
+            return []
+
+        results = []
+        with self._connect() as conn:
+            placeholders = ','.join('?' * len(terms))
+            frequencies = dict(conn.execute(
+                f"SELECT term, df FROM terms WHERE term IN ({placeholders})", list(terms)
+            ).fetchall())
+            if len(frequencies) < len(terms):
+                return []
+            rarest, *others = sorted(terms, key=frequencies.get)
+
+            # Page through the rarest term's postings, newest first
+            last_id = None
+            page_size = max(limit * 10, 200)
+            while len(results) < limit:
+                if last_id is None:
+                    page = conn.execute(
+                        "SELECT doc_id FROM postings WHERE term = ? ORDER BY doc_id DESC LIMIT ?",
+                        (rarest, page_size)
+                    ).fetchall()
+                else:
+                    page = conn.execute(
+                        "SELECT doc_id FROM postings WHERE term = ? AND doc_id < ? ORDER BY doc_id DESC LIMIT ?",
+                        (rarest, last_id, page_size)
+                    ).fetchall()
+                if not page:
+                    break
+                last_id = page[-1][0]
+
+                candidates = [row[0] for row in page]
+                for term in others:
+                    if not candidates:
+                        break
+                    found = {row[0] for row in conn.execute(
+                        f"SELECT doc_id FROM postings WHERE term = ? AND doc_id IN ({','.join('?' * len(candidates))})",
+                        [term] + candidates
+                    )}
+                    candidates = [doc_id for doc_id in candidates if doc_id in found]
+                if not candidates:
+                    continue
+
+                rows = conn.execute(
+                    "SELECT id, created_at, language, confidence, original, english, search_text FROM transcripts "
+                    f"WHERE id IN ({','.join('?' * len(candidates))}) ORDER BY id DESC",
+                    candidates
+                ).fetchall()
+                for row in rows:
+                    # Bigrams can match out of order; confirm the phrase itself, ignoring
+                    # punctuation and spacing on both sides
+                    if needle in row[6]:
+                        results.append({
+                            'id': row[0],
+                            'created_at': row[1],
+                            'language': row[2],
+                            'confidence': row[3],
+                            'original': row[4],
+                            'english': row[5]
+                        })
+                        if len(results) >= limit:
+                            break
+        return results
+
+    def count(self):
+        """Return the number of stored transcripts"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+
+
+def main():
+    """Command line entry point: python transcript_history.py "search text" """
+    parser = argparse.ArgumentParser(description="Search transcript history")
+    parser.add_argument("query", help="Text to search for, in any script")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", default=HISTORY_DB_PATH)
+    args = parser.parse_args()
+
+    for item in TranscriptHistory(args.db).search(args.query, limit=args.limit):
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(item['created_at']))
+        print(f"[{when}] [{item['language']}] {item['original']}")
+        if item['english'] and item['english'] != item['original']:
+            print(f"    🌐 {item['english']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Distributed work queue for batch transcription across machines
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from config import WORKER_LEASE_SECONDS, WORKER_CONCURRENCY, WORKER_MAX_ATTEMPTS, WORKER_POLL_SECONDS
+
+
+class JobQueue:
+    """
+    Job queue backed by a SQLite file on storage shared by all workers
+
+    Workers lease jobs for a limited time and extend the lease with
+    heartbeats. If a worker crashes, its lease expires and the job is
+    handed to another worker. Results are committed idempotently: the
+    first commit for a job wins and later duplicates are ignored.
+
+    SQLite locking relies on the shared filesystem honouring POSIX locks
+    (NFSv4 or SMB with locking enabled).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    audio_path TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker_id TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    expired_leases INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    job_id INTEGER PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    completed_at REAL NOT NULL
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if 'expired_leases' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN expired_leases INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block inside a write transaction (BEGIN IMMEDIATE)"""
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def submit(self, audio_file_path, **options):
+        """
+        Add a transcription job
+
+        Args:
+            audio_file_path (str): Audio path, reachable from every worker
+            **options: Options passed to SarvamSTT.transcribe_multichannel
+
+        Returns:
+            int: Job id
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (audio_path, options, created_at) VALUES (?, ?, ?)",
+                (audio_file_path, json.dumps(options), time.time())
+            )
+            return cursor.lastrowid
+
+    def lease(self, worker_id, lease_seconds=WORKER_LEASE_SECONDS):
+        """
+        Claim the oldest available job, including jobs whose lease has expired
+
+        Only expired leases count towards WORKER_MAX_ATTEMPTS; jobs given
+        back with release() after a retryable API error do not. A job that
+        reaches the limit is failed with a committed failure result.
+
+        Returns:
+            dict: Job with 'id', 'audio_path', 'options' and 'attempts', or None if idle
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # An expired lease means its worker died holding the job; jobs that
+            # keep killing their workers are not retried forever
+            expired = conn.execute(
+                "SELECT id, worker_id, expired_leases FROM jobs WHERE status = 'leased' AND lease_expires < ?",
+                (now,)
+            ).fetchall()
+            for job_id, holder, expired_leases in expired:
+                if expired_leases + 1 >= WORKER_MAX_ATTEMPTS:
+                    error = "Lease expired too many times"
+                    conn.execute(
+                        "INSERT OR IGNORE INTO results (job_id, worker_id, result, completed_at) VALUES (?, ?, ?, ?)",
+                        (job_id, holder or worker_id,
+                         json.dumps({'success': False, 'error': error, 'transcript': ''}), now)
+                    )
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', expired_leases = expired_leases + 1, last_error = ? "
+                        "WHERE id = ?",
+                        (error, job_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'pending', worker_id = NULL, lease_expires = NULL, "
+                        "expired_leases = expired_leases + 1, last_error = 'Lease expired' WHERE id = ?",
+                        (job_id,)
+                    )
+            row = conn.execute(
+                "SELECT id, audio_path, options, attempts FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, row[0])
+            )
+        return {'id': row[0], 'audio_path': row[1], 'options': json.loads(row[2]), 'attempts': row[3] + 1}
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=WORKER_LEASE_SECONDS):
+        """
+        Extend a lease
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result):
+        """
+        Commit a job result
+
+        Returns:
+            bool: True if this was the first commit for the job
+        """
+        status = "done" if result.get('success') else "failed"
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO results (job_id, worker_id, result, completed_at) VALUES (?, ?, ?, ?)",
+                (job_id, worker_id, json.dumps(result, ensure_ascii=False), time.time())
+            )
+            if cursor.rowcount != 1:
+                return False
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, last_error = ? WHERE id = ?",
+                (status, worker_id, result.get('error'), job_id)
+            )
+            return True
+
+    def release(self, job_id, worker_id, error=None):
+        """Give a leased job back to the queue so it can be retried"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', worker_id = NULL, lease_expires = NULL, last_error = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (error, job_id, worker_id)
+            )
+
+    def get_result(self, job_id):
+        """Return the committed result of a job, or None if it has none yet"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT result FROM results WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stats(self):
+        """Return the number of jobs per status"""
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class Worker:
+    """
+    Pulls jobs from a JobQueue and transcribes them with SarvamSTT
+
+    Each worker runs `concurrency` job loops. A heartbeat thread extends the
+    lease of every job in progress; retryable API failures give the job back
+    to the queue, everything else commits a result.
+    """
+
+    def __init__(self, queue, stt=None, worker_id=None, concurrency=WORKER_CONCURRENCY,
+                 lease_seconds=WORKER_LEASE_SECONDS):
+        if stt is None:
+            from sarvam_client import SarvamSTT
+            stt = SarvamSTT()
+        self.queue = queue
+        self.stt = stt
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.processed = 0
+        self._active = {}
+        self._loops = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, exit_when_idle=False):
+        """Process jobs until stop() is called (or the queue is empty, if exit_when_idle)"""
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        self._loops = [
+            threading.Thread(target=self._job_loop, args=(exit_when_idle,), daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        for loop in self._loops:
+            loop.start()
+        for loop in self._loops:
+            loop.join()
+        self._stop.set()
+
+    def stop(self, timeout=None):
+        """
+        Stop taking jobs and wait up to `timeout` seconds for the jobs in progress
+
+        Jobs still running after the timeout are released back to the queue,
+        so stopping a worker does not leave leases behind to expire and count
+        against WORKER_MAX_ATTEMPTS.
+        """
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for loop in self._loops:
+            if loop is not threading.current_thread():
+                loop.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            job_ids = list(self._active)
+        for job_id in job_ids:
+            self.queue.release(job_id, self.worker_id, "Worker stopped")
+
+    def _job_loop(self, exit_when_idle):
+        while not self._stop.is_set():
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if not job:
+                if exit_when_idle:
+                    return
+                self._stop.wait(WORKER_POLL_SECONDS)
+                continue
+
+            with self._lock:
+                self._active[job['id']] = job
+            try:
+                result = self.stt.transcribe_multichannel(job['audio_path'], priority="batch", **job['options'])
+            except Exception as e:
+                result = {'success': False, 'error': f"Unexpected error: {str(e)}", 'transcript': ''}
+
+            # The job stays active until its outcome is stored, so stop() can release it until then
+            try:
+                if not result['success'] and result.get('retryable'):
+                    self.queue.release(job['id'], self.worker_id, result.get('error'))
+                elif self.queue.complete(job['id'], self.worker_id, result):
+                    with self._lock:
+                        self.processed += 1
+            finally:
+                with self._lock:
+                    self._active.pop(job['id'], None)
+            if not result['success'] and result.get('retryable'):
+                self._stop.wait(WORKER_POLL_SECONDS)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                job_ids = list(self._active)
+            for job_id in job_ids:
+                if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                    print(f"⚠️ Lost lease on job {job_id}; another worker may commit it first")
+
+
+def main():
+    """Command line entry point for submitting jobs and running workers"""
+    parser = argparse.ArgumentParser(description="Distributed batch transcription with Sarvam AI")
+    parser.add_argument("db", help="Queue database on shared storage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue audio files")
+    submit.add_argument("audio_files", nargs="+")
+    submit.add_argument("--language", default="unknown", help="Language code (default: auto-detect)")
+    submit.add_argument("--english", action="store_true", help="Translate transcripts to English")
+
+    worker = commands.add_parser("worker", help="Run a worker")
+    worker.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    worker.add_argument("--exit-when-idle", action="store_true")
+
+    commands.add_parser("status", help="Show job counts")
+
+    args = parser.parse_args()
+    queue = JobQueue(args.db)
+
+    if args.command == "submit":
+        for path in args.audio_files:
+            job_id = queue.submit(
+                os.path.abspath(path),
+                language_code=args.language,
+                translate_to_english=args.english
+            )
+            print(f"📥 Job {job_id}: {path}")
+    elif args.command == "worker":
+        w = Worker(queue, concurrency=args.concurrency)
+        print(f"🚀 Worker {w.worker_id} started")
+        try:
+            w.run(exit_when_idle=args.exit_when_idle)
+        except KeyboardInterrupt:
+            print("⏹️ Finishing jobs in progress (Ctrl-C again to hand them back to the queue now)")
+            try:
+                w.stop()
+            except KeyboardInterrupt:
+                w.stop(timeout=0)
+        print(f"✅ Worker {w.worker_id} processed {w.processed} jobs")
+    else:
+        print(queue.stats())
+
+
+if __name__ == "__main__":
+    main()